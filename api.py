@@ -0,0 +1,269 @@
+"""
+Versioned read-only JSON API for FlavorVault.
+
+Registered under ``/api/v1``. List responses are keyset paginated like the
+HTML pages and are written to the client while the database cursor is
+still being read, so a page is never held in memory as one JSON document.
+"""
+
+import json
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from flask import Blueprint, current_app, jsonify, request, stream_with_context
+from pymongo.errors import PyMongoError
+
+from database import get_all_categories, read_routing, view_counter
+from ingredients import match_pantry, parse_ingredients
+from pagination import paginate, parse_cursor
+from search import parse_score_cursor, search_recipes
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Recipe fields clients may request; _id is always returned
+RECIPE_FIELDS = (
+    "recipe_name",
+    "category_name",
+    "recipe_description",
+    "ingredients",
+    "date_added",
+    "healthy",
+    "created_by",
+    "revision",
+)
+CATEGORY_FIELDS = ("category_name", "recipe_count")
+MAX_PAGE_SIZE = 100
+
+
+def _default(obj):
+    """Serialise the BSON types the encoder does not know about."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Compact separators keep the C-accelerated encoder path and small payloads
+encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+def stream_page(page):
+    """
+    Stream a KeysetPage as a JSON response.
+
+    Args:
+        page (KeysetPage): The page to serialise
+
+    Returns:
+        Response: ``{"data": [...], "next": ..., "prev": ...}`` written
+                  document by document as the cursor yields them
+
+    Notes:
+        - The cursors are only known once every document has been read,
+          so they follow the data in the body
+        - A database error after the first chunk has been sent can only
+          cut the body short, as the status code is already on the wire
+    """
+
+    def generate():
+        yield '{"data":['
+        for index, document in enumerate(page):
+            yield ("," if index else "") + encoder.encode(document)
+        yield '],"next":' + encoder.encode(page.next_cursor)
+        yield ',"prev":' + encoder.encode(page.prev_cursor) + "}"
+
+    return current_app.response_class(
+        stream_with_context(generate()), mimetype="application/json"
+    )
+
+
+def error(message, status):
+    """
+    Build a JSON error response.
+
+    Args:
+        message (str): Human readable description of the error
+        status (int): HTTP status code
+
+    Returns:
+        tuple: JSON body and status code
+    """
+    return jsonify({"error": message}), status
+
+
+def page_size():
+    """Read the ``limit`` query argument, clamped to 1..MAX_PAGE_SIZE."""
+    limit = request.args.get("limit", type=int)
+    if not limit:
+        return current_app.config["RECIPES_PER_PAGE"]
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def recipe_projection():
+    """
+    Build a projection from the comma separated ``fields`` query argument.
+
+    Returns:
+        dict: Projection of the requested fields, or of every public field
+              when none (or only unknown ones) were requested
+    """
+    requested = [
+        field.strip()
+        for field in request.args.get("fields", "").split(",")
+        if field.strip() in RECIPE_FIELDS
+    ]
+    return dict.fromkeys(requested or RECIPE_FIELDS, 1)
+
+
+@api.errorhandler(PyMongoError)
+def database_error(e):
+    """
+    Report database failures as JSON rather than redirecting.
+
+    Args:
+        e (PyMongoError): The exception that was raised
+
+    Returns:
+        tuple: JSON error body and 503 status code
+    """
+    current_app.logger.error("Database error: %s", str(e))
+    return error("Database unavailable", 503)
+
+
+@api.route("/recipes")
+def list_recipes():
+    """
+    List recipes newest first.
+
+    Query args:
+        after / before: Cursor from a previous page's ``next`` / ``prev``
+        limit: Page size, at most MAX_PAGE_SIZE
+        fields: Comma separated subset of RECIPE_FIELDS
+
+    Returns:
+        Response: Streamed JSON page of recipes
+    """
+    return stream_page(
+        paginate(
+            read_routing.database().recipes,
+            projection=recipe_projection(),
+            page_size=page_size(),
+            after=parse_cursor(request.args.get("after")),
+            before=parse_cursor(request.args.get("before")),
+            session=read_routing.session(),
+        )
+    )
+
+
+@api.route("/recipes/<recipe_id>")
+def get_recipe(recipe_id):
+    """
+    Fetch a single recipe.
+
+    Args:
+        recipe_id (str): MongoDB ObjectId of the recipe
+
+    Returns:
+        Response: JSON recipe, or a 404 JSON error
+
+    Notes:
+        - Counted as a view of the recipe, written later in bulk
+    """
+    try:
+        recipe = read_routing.database().recipes.find_one(
+            {"_id": ObjectId(recipe_id)},
+            dict.fromkeys(RECIPE_FIELDS, 1),
+            session=read_routing.session(),
+        )
+    except InvalidId:
+        recipe = None
+    if not recipe:
+        return error("Recipe not found", 404)
+    view_counter.record_recipe(recipe["_id"])
+    return current_app.response_class(
+        encoder.encode(recipe), mimetype="application/json"
+    )
+
+
+@api.route("/categories")
+def list_categories():
+    """
+    List all categories sorted by name.
+
+    Returns:
+        Response: JSON list of categories with their recipe counts
+    """
+    categories = [
+        {
+            "_id": category["_id"],
+            **{field: category.get(field) for field in CATEGORY_FIELDS},
+        }
+        for category in get_all_categories()
+    ]
+    return current_app.response_class(
+        encoder.encode({"data": categories}), mimetype="application/json"
+    )
+
+
+@api.route("/search")
+def search():
+    """
+    Search recipes by text, best matches first.
+
+    Query args:
+        query: Words to search for (required)
+        category_name: Only return recipes in this category
+        healthy: Only return healthy recipes when set
+        after: Cursor from a previous page's ``next``
+        limit / fields: As for the recipe list
+
+    Returns:
+        Response: Streamed JSON page of results, each with its ``score``
+    """
+    query = request.args.get("query", "").strip()
+    if not query:
+        return error("The query parameter is required", 400)
+
+    return stream_page(
+        search_recipes(
+            read_routing.database().recipes,
+            query,
+            category_name=request.args.get("category_name") or None,
+            healthy=bool(request.args.get("healthy")),
+            projection=recipe_projection(),
+            page_size=page_size(),
+            after=parse_score_cursor(request.args.get("after")),
+            session=read_routing.session(),
+        )
+    )
+
+
+@api.route("/pantry")
+def pantry():
+    """
+    Rank recipes by how much of them a pantry covers.
+
+    Query args:
+        ingredients: Comma separated ingredient names (required)
+        limit / fields: As for the recipe list
+
+    Returns:
+        Response: JSON list of the best covered recipes, each with its
+                  ``coverage`` (0-1), ``matched`` count and ``missing``
+                  ingredients
+    """
+    pantry_items = parse_ingredients(request.args.get("ingredients", ""))
+    if not pantry_items:
+        return error("The ingredients parameter is required", 400)
+
+    recipes = match_pantry(
+        read_routing.database().recipes,
+        pantry_items,
+        projection=recipe_projection(),
+        limit=page_size(),
+        session=read_routing.session(),
+    )
+    return current_app.response_class(
+        encoder.encode({"data": recipes}), mimetype="application/json"
+    )
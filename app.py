@@ -4,24 +4,33 @@ This module contains the main application logic and route handlers.
 """
 
 from functools import wraps
+import atexit
 import os
 
+import click
+
 # Group bson imports together
 from bson.errors import InvalidId
 from bson.objectid import ObjectId
 from flask import (
     Flask,
     flash,
+    g,
+    get_flashed_messages,
+    get_template_attribute,
+    make_response,
     render_template,
     redirect,
     request,
     session,
+    stream_template,
     url_for,
 )
-from flask_pymongo import PyMongo
 from flask_wtf import FlaskForm
-from pymongo.errors import PyMongoError
-from werkzeug.security import generate_password_hash, check_password_hash
+from gridfs.errors import NoFile
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import wrap_file
 from wtforms import (
     StringField,
     PasswordField,
@@ -30,19 +39,165 @@ from wtforms import (
 )
 from wtforms.validators import DataRequired, Length, EqualTo, Email
 
+from api import api
+from assets import StaticAssets, build_assets, vendor_assets
+from compression import CompressionMiddleware
+from dates import (
+    ISO_FORMAT,
+    format_date,
+    paginate_by_date,
+    parse_date,
+    parse_date_cursor,
+)
+from database import (
+    category_cache,
+    get_all_categories,
+    mongo,
+    read_routing,
+    view_counter,
+)
+from facets import FacetCache, load_facets, recipe_filter
+from fragment_cache import FragmentCache
+from hashing import HashingBusy, PasswordHasher
+from images import (
+    ThumbnailWorker,
+    delete_images,
+    generate_thumbnails,
+    image_bucket,
+    store_upload,
+)
+from ingredients import match_pantry, parse_ingredients
+from instrumentation import RequestMetrics
+from migrations import (
+    backfill_recipe_counts,
+    ensure_indexes,
+    find_collection_scans,
+    migrate_recipe_dates,
+    rebuild_recipe_counts,
+)
+from pagination import KeysetPage, paginate, parse_cursor
+from profiles import ProfileCache, load_profile
+from recipe_io import (
+    FORMATS,
+    detect_format,
+    export_recipes,
+    import_recipes,
+    read_records,
+)
+from search import parse_score_cursor, search_recipes
+from similarity import update_similar
+from versioning import bump_versions, get_versions, make_etag, template_fingerprint
+
 if os.path.exists("env.py"):
     import env  # pylint: disable=unused-import
 
     # env.py sets environment variables, import is needed even if unused
 
 app = Flask(__name__)
+app.register_blueprint(api)
 
 app.config["MONGO_DBNAME"] = os.environ.get("MONGO_DBNAME")
 app.config["MONGO_URI"] = os.environ.get("MONGO_URI")
 app.secret_key = os.environ.get("SECRET_KEY")
 app.config["WTF_CSRF_ENABLED"] = True
-
-mongo = PyMongo(app)
+app.config["RECIPES_PER_PAGE"] = int(os.environ.get("RECIPES_PER_PAGE", "20"))
+app.config["CATEGORY_CACHE_TTL"] = int(os.environ.get("CATEGORY_CACHE_TTL", "300"))
+# Endpoints whose pages are streamed to the client as they render
+app.config["STREAMED_ROUTES"] = {
+    endpoint.strip()
+    for endpoint in os.environ.get("STREAMED_ROUTES", "get_recipes").split(",")
+    if endpoint.strip()
+}
+# Read preference for the endpoints in READ_ROUTES, e.g. secondaryPreferred
+app.config["MONGO_READ_PREFERENCE"] = os.environ.get("MONGO_READ_PREFERENCE", "primary")
+# Secondaries lagging further behind the primary are not read from (min 90)
+app.config["MONGO_MAX_STALENESS_SECONDS"] = int(
+    os.environ.get("MONGO_MAX_STALENESS_SECONDS", "120")
+)
+# Read-only endpoints whose queries may be served by secondaries
+app.config["READ_ROUTES"] = {
+    endpoint.strip()
+    for endpoint in os.environ.get(
+        "READ_ROUTES",
+        "get_recipes,search,pantry,profile,categories,"
+        "api.list_recipes,api.get_recipe,api.search,api.pantry",
+    ).split(",")
+    if endpoint.strip()
+}
+
+# Salts page ETags; defaults to a hash of the templates so deploys invalidate
+app.config["ETAG_SALT"] = os.environ.get("ETAG_SALT") or template_fingerprint(
+    os.path.join(app.root_path, app.template_folder)
+)
+app.config["ENSURE_INDEXES_ON_STARTUP"] = (
+    os.environ.get("ENSURE_INDEXES_ON_STARTUP", "False").lower() == "true"
+)
+# Largest accepted request body, which bounds image uploads
+app.config["MAX_CONTENT_LENGTH"] = int(
+    os.environ.get("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024))
+)
+# Response compression; set COMPRESSION_ENABLED=False behind a compressing proxy
+app.config["COMPRESSION_ENABLED"] = (
+    os.environ.get("COMPRESSION_ENABLED", "True").lower() == "true"
+)
+app.config["COMPRESSION_MIN_SIZE"] = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+# Input bytes compressed between flushes of a streamed page
+app.config["COMPRESSION_FLUSH_SIZE"] = int(
+    os.environ.get("COMPRESSION_FLUSH_SIZE", "8192")
+)
+app.config["COMPRESSION_GZIP_LEVEL"] = int(
+    os.environ.get("COMPRESSION_GZIP_LEVEL", "6")
+)
+app.config["COMPRESSION_BROTLI_QUALITY"] = int(
+    os.environ.get("COMPRESSION_BROTLI_QUALITY", "4")
+)
+# View counts are buffered per worker and flushed every VIEW_FLUSH_INTERVAL
+# seconds, or once VIEW_FLUSH_SIZE recipes and categories have views waiting
+app.config["VIEW_FLUSH_INTERVAL"] = float(os.environ.get("VIEW_FLUSH_INTERVAL", "10"))
+app.config["VIEW_FLUSH_SIZE"] = int(os.environ.get("VIEW_FLUSH_SIZE", "1000"))
+# Recipes and categories buffered at most; further views are dropped
+app.config["VIEW_BUFFER_LIMIT"] = int(os.environ.get("VIEW_BUFFER_LIMIT", "10000"))
+
+# MongoClient pool and timeout options, read from the environment when set
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": "MONGO_MAX_POOL_SIZE",
+    "minPoolSize": "MONGO_MIN_POOL_SIZE",
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+    "socketTimeoutMS": "MONGO_SOCKET_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+}
+
+password_hasher = PasswordHasher(
+    method=os.environ.get("PASSWORD_HASH_METHOD", "scrypt"),
+    max_workers=int(os.environ.get("PASSWORD_HASH_WORKERS", "2")),
+    max_pending=int(os.environ.get("PASSWORD_HASH_QUEUE", "16")),
+)
+atexit.register(password_hasher.shutdown)
+thumbnail_worker = ThumbnailWorker(
+    max_workers=int(os.environ.get("THUMBNAIL_WORKERS", "2")),
+    max_pending=int(os.environ.get("THUMBNAIL_QUEUE", "64")),
+)
+atexit.register(thumbnail_worker.shutdown)
+# Writes the views still buffered when a worker exits
+atexit.register(view_counter.shutdown)
+fragment_cache = FragmentCache(
+    max_size=int(os.environ.get("FRAGMENT_CACHE_MAX_SIZE", str(8 * 1024 * 1024)))
+)
+profile_cache = ProfileCache(
+    ttl=int(os.environ.get("PROFILE_CACHE_TTL", "300")),
+    max_users=int(os.environ.get("PROFILE_CACHE_MAX_USERS", "1000")),
+    max_pages=int(os.environ.get("PROFILE_CACHE_MAX_PAGES", "8")),
+)
+facet_cache = FacetCache(
+    max_entries=int(os.environ.get("FACET_CACHE_MAX_ENTRIES", "256"))
+)
+request_metrics = RequestMetrics()
+request_metrics.init_app(app)
+static_assets = StaticAssets()
+static_assets.init_app(app)
+app.add_template_filter(format_date)
 
 # Constants for flash messages
 USERNAME_EXISTS_MSG = "Username already exists"
@@ -68,7 +223,29 @@ USER_NOT_FOUND_MSG = "User not found"
 RECIPE_EDIT_ERROR_MSG = "You can only edit your own recipes!"
 RECIPE_NOT_FOUND_MSG = "Recipe not found"
 RECIPE_DELETE_ERROR_MSG = "You can only delete your own recipes!"
+RECIPE_CONFLICT_MSG = (
+    "This recipe was changed while you were editing it. "
+    "Please review the latest version and save again."
+)
 CATEGORY_EXISTS_ERROR_MSG = "Category already exists"
+SERVER_BUSY_MSG = "The server is busy, please try again in a moment."
+IMAGE_TYPE_ERROR_MSG = "Images must be JPEG, PNG, WebP or GIF files"
+IMAGE_TOO_LARGE_MSG = "That file is too large to upload"
+# Uploaded images are public and never change, so browsers may keep them
+IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Fields rendered by recipes.html, everything else stays in the database
+RECIPE_LIST_PROJECTION = {
+    "recipe_name": 1,
+    "category_name": 1,
+    "recipe_description": 1,
+    "ingredients": 1,
+    "similar._id": 1,
+    "similar.recipe_name": 1,
+    "created_by": 1,
+    "revision": 1,
+    "image.thumbnails.small": 1,
+}
 
 
 # Centralized error handler
@@ -88,6 +265,216 @@ def handle_db_error(e=None):
     return redirect(url_for("get_recipes"))
 
 
+def adjust_recipe_count(category_name, delta):
+    """
+    Atomically add delta to a category's denormalised recipe_count.
+
+    Args:
+        category_name (str): Name of the category to update
+        delta (int): Amount to add, negative when recipes are removed
+
+    Notes:
+        - Categories without a count yet are left alone until `db init`
+          fills it in; an $inc would start them from zero and miss the
+          recipes they already hold
+        - The cached category list carries the counts, so it is invalidated
+    """
+    mongo.db.categories.update_one(
+        {"category_name": category_name, "recipe_count": {"$exists": True}},
+        {"$inc": {"recipe_count": delta}},
+    )
+    category_cache.invalidate()
+
+
+@app.template_global()
+def recipe_fragment(recipe):
+    """
+    Return the cached viewer-independent HTML for a recipe list item.
+
+    Args:
+        recipe (dict): Recipe document projected with RECIPE_LIST_PROJECTION
+
+    Returns:
+        tuple: Rendered recipe title and recipe details HTML
+
+    Notes:
+        - Cached by recipe id and checked against its revision and small
+          thumbnail, so edits and thumbnails written by any worker are
+          picked up
+        - Per-viewer Edit/Delete buttons are rendered outside the cache
+    """
+
+    def render():
+        return (
+            get_template_attribute("recipe_fragment.html", "recipe_title")(recipe),
+            get_template_attribute("recipe_fragment.html", "recipe_details")(recipe),
+        )
+
+    # Thumbnails are written in the background without bumping the revision
+    thumbnail = ((recipe.get("image") or {}).get("thumbnails") or {}).get("small")
+    return fragment_cache.get(
+        str(recipe["_id"]), (recipe.get("revision", 0), thumbnail), render
+    )
+
+
+def process_recipe_image(recipe_id, original_id, created_by):
+    """
+    Generate a recipe image's thumbnails; runs on the thumbnail worker.
+
+    Args:
+        recipe_id (ObjectId): Recipe the image belongs to
+        original_id (ObjectId): GridFS id of the uploaded original
+        created_by (str): Owner of the recipe, whose profile is refreshed
+
+    Notes:
+        - The recipe is only updated if it still points at this original,
+          so a replaced or deleted image leaves no orphaned thumbnails
+        - Images Pillow cannot decode are deleted and unset
+        - The version stamp is bumped so pages pick up the thumbnail; the
+          revision is left alone, as it guards users' concurrent edits and
+          this is not one. Cached fragments are keyed on the thumbnail too
+    """
+    current = {"_id": recipe_id, "image.original": original_id}
+    try:
+        try:
+            thumbnails = generate_thumbnails(mongo.db, recipe_id, original_id)
+        except ValueError as e:
+            app.logger.warning("Rejected image %s: %s", original_id, str(e))
+            mongo.db.recipes.update_one(current, {"$unset": {"image": ""}})
+            return
+
+        result = mongo.db.recipes.update_one(
+            current,
+            {"$set": {"image.thumbnails": thumbnails}},
+        )
+        if not result.matched_count:
+            delete_images(mongo.db, thumbnails)
+            return
+        fragment_cache.evict(str(recipe_id))
+        profile_cache.invalidate(created_by)
+        bump_versions(mongo.db, "recipes")
+    except PyMongoError as e:
+        app.logger.error("Thumbnailing %s failed: %s", original_id, str(e))
+
+
+def store_recipe_image(recipe_id):
+    """
+    Store the image uploaded with the current request, if any.
+
+    Args:
+        recipe_id (ObjectId): Recipe the image belongs to
+
+    Returns:
+        dict: The recipe's new ``image`` field, or None if no usable file
+              was uploaded
+
+    Notes:
+        - Unsupported file types are reported with a flash message
+        - The image is stored before the recipe is written so both land
+          in one write; delete it again if that write fails
+    """
+    upload = request.files.get("recipe_image")
+    if not upload or not upload.filename:
+        return None
+    try:
+        original_id = store_upload(mongo.db, upload, recipe_id)
+    except ValueError:
+        flash(IMAGE_TYPE_ERROR_MSG)
+        return None
+    return {"original": original_id, "thumbnails": {}}
+
+
+def queue_thumbnails(recipe_id, image, created_by):
+    """
+    Queue thumbnail generation for a newly stored image.
+
+    Args:
+        recipe_id (ObjectId): Recipe the image belongs to
+        image (dict): The recipe's ``image`` field
+        created_by (str): Owner of the recipe
+    """
+    if not thumbnail_worker.submit(
+        process_recipe_image, recipe_id, image["original"], created_by
+    ):
+        app.logger.warning("Thumbnail queue full, skipped %s", image["original"])
+
+
+def recipe_write_filter(recipe_id):
+    """
+    Build the filter matching a recipe the logged-in user may change.
+
+    Args:
+        recipe_id (str): MongoDB ObjectId of the recipe
+
+    Returns:
+        dict: Filter on the recipe id and, unless the user is the admin,
+              on ``created_by``
+
+    Notes:
+        - Folding the ownership check into the write makes the check and
+          the change a single atomic round trip
+    """
+    query = {"_id": ObjectId(recipe_id)}
+    if session["user"].lower() != "admin":
+        query["created_by"] = session["user"]
+    return query
+
+
+def reject_recipe_write(recipe_id, forbidden_msg):
+    """
+    Explain why a recipe write matched nothing.
+
+    Args:
+        recipe_id (str): MongoDB ObjectId of the recipe
+        forbidden_msg (str): Message shown when the user does not own it
+
+    Returns:
+        Response: Redirect to the recipes page if the recipe is missing or
+                  not the user's, or back to the edit form if it was
+                  changed since the form was loaded
+
+    Notes:
+        - Only runs after a failed write, so successful writes stay at
+          one round trip
+    """
+    recipe = mongo.db.recipes.find_one({"_id": ObjectId(recipe_id)}, {"created_by": 1})
+    if recipe is None:
+        flash(RECIPE_NOT_FOUND_MSG)
+        return redirect(url_for("get_recipes"))
+    if session["user"].lower() != "admin" and recipe["created_by"] != session["user"]:
+        flash(forbidden_msg)
+        return redirect(url_for("get_recipes"))
+    flash(RECIPE_CONFLICT_MSG)
+    return redirect(url_for("edit_recipe", recipe_id=recipe_id))
+
+
+def render_page(template_name, **context):
+    """
+    Render a template, streaming it if the current route is configured to.
+
+    Args:
+        template_name (str): Name of the template to render
+        **context: Variables passed to the template
+
+    Returns:
+        Response: Fully rendered page, or a streamed response when the
+                  current endpoint is listed in STREAMED_ROUTES
+
+    Notes:
+        - Streamed pages flush the header and navigation straight away and
+          send list rows as the database cursor yields them
+        - Flashed messages are read before streaming starts because the
+          session cookie is written before the body is sent
+        - Once streaming has started the status code can no longer change,
+          so streamed templates should not depend on failing queries
+    """
+    if request.endpoint not in app.config["STREAMED_ROUTES"]:
+        return render_template(template_name, **context)
+
+    get_flashed_messages()
+    return stream_template(template_name, **context)
+
+
 def admin_required(f):
     """
     Decorator to restrict access to admin users only.
@@ -112,18 +499,225 @@ def admin_required(f):
     return decorated_function
 
 
+def conditional_get(*collections):
+    """
+    Decorator answering conditional GETs from collection version stamps.
+
+    Args:
+        *collections (str): Names of the collections the page is built from
+
+    Returns:
+        function: Decorator that sets an ETag on successful responses and
+                  returns 304 Not Modified when the client's copy is current
+
+    Notes:
+        - The ETag covers the version stamps, the logged-in user (who sees
+          different Edit/Delete buttons), the full request path, the
+          template fingerprint and the asset manifest, so a rebuild that
+          renames static files is never answered with 304
+        - A 304 costs one lookup on the version stamps and never touches
+          the page's own collections
+        - Requests with pending flash messages are always rendered so the
+          messages are shown
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if "_flashes" in session:
+                return f(*args, **kwargs)
+
+            try:
+                versions = get_versions(
+                    read_routing.database(),
+                    *collections,
+                    session=read_routing.session(),
+                )
+            except PyMongoError as e:
+                return handle_db_error(e)
+            # Views may key their own caches on the stamps already read
+            g.collection_versions = versions
+            etag = make_etag(
+                versions,
+                app.config["ETAG_SALT"],
+                static_assets.fingerprint,
+                session.get("user", ""),
+                request.full_path,
+            )
+
+            # Weak comparison, as the compression middleware weakens ETags
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
 # Get recipes
 @app.route("/")
 @app.route("/get_recipes")
+@app.route("/recipes")
+@conditional_get("recipes")
 def get_recipes():
     """
-    Display all recipes on the home page.
+    Display recipes on the home page, newest first, one page at a time.
 
     Returns:
-        Response: Rendered recipes.html template with all recipes
+        Response: Rendered recipes.html template with a page of recipes
+                  and the filter sidebar
+
+    Notes:
+        - Pages are addressed by the ``after``/``before`` cursors in the
+          query string (keyset pagination), never by an offset
+        - Recipes are ordered newest added first, or by ``date_added``
+          with ``sort=date``, served by the date_added_id index
+        - ``category``, ``healthy`` and the ``date_from``/``date_to``
+          range (ISO dates, both inclusive) narrow the list
+        - Sidebar counts come from one aggregation cached against the
+          recipes version stamp
+        - Page size is set by the RECIPES_PER_PAGE config value
+        - Only the fields shown in the list are fetched
+        - Streamed when get_recipes is listed in STREAMED_ROUTES
+        - Answers If-None-Match with 304 while no recipe has changed
+        - May be served by a secondary (see READ_ROUTES), never from
+          before the user's own latest write
+        - Rendered pages filtered by category count as a view of the
+          category, written later in bulk
     """
-    recipes = mongo.db.recipes.find()
-    return render_template("recipes.html", recipes=recipes)
+    category_name = request.args.get("category") or None
+    healthy = bool(request.args.get("healthy"))
+    by_date = request.args.get("sort") == "date"
+    start = parse_date(request.args.get("date_from"))
+    end = parse_date(request.args.get("date_to"))
+    # Current filters, for links that change one of them
+    filters = {
+        "category": category_name,
+        "healthy": "on" if healthy else None,
+        "sort": "date" if by_date else None,
+        "date_from": format_date(start, ISO_FORMAT) or None,
+        "date_to": format_date(end, ISO_FORMAT) or None,
+    }
+
+    db, db_session = read_routing.database(), read_routing.session()
+    versions = g.get("collection_versions") or get_versions(
+        db, "recipes", session=db_session
+    )
+    facets = facet_cache.get(
+        versions["recipes"],
+        (category_name, healthy, start, end),
+        lambda: load_facets(
+            db.recipes, category_name, healthy, start, end, session=db_session
+        ),
+    )
+    if by_date:
+        page, parse = paginate_by_date, parse_date_cursor
+    else:
+        page, parse = paginate, parse_cursor
+    recipes = page(
+        db.recipes,
+        query=recipe_filter(category_name, healthy, start, end),
+        projection=RECIPE_LIST_PROJECTION,
+        page_size=app.config["RECIPES_PER_PAGE"],
+        after=parse(request.args.get("after")),
+        before=parse(request.args.get("before")),
+        session=db_session,
+    )
+    if category_name:
+        view_counter.record_category(category_name)
+    return render_page(
+        "recipes.html",
+        recipes=recipes,
+        facets=facets,
+        category_name=category_name,
+        healthy=healthy,
+        by_date=by_date,
+        filters=filters,
+    )
+
+
+# Search recipes
+@app.route("/search")
+def search():
+    """
+    Search recipes by name and description, best matches first.
+
+    Returns:
+        Response: Rendered search.html template with the search form and,
+                  when a query was given, one page of ranked results
+
+    Notes:
+        - Optional ``category_name`` and ``healthy`` filters narrow results
+        - Further pages are addressed by the ``after`` cursor
+    """
+    query = request.args.get("query", "").strip()
+    category_name = request.args.get("category_name") or None
+    healthy = bool(request.args.get("healthy"))
+
+    try:
+        recipes = None
+        if query:
+            recipes = search_recipes(
+                read_routing.database().recipes,
+                query,
+                category_name=category_name,
+                healthy=healthy,
+                projection=RECIPE_LIST_PROJECTION,
+                page_size=app.config["RECIPES_PER_PAGE"],
+                after=parse_score_cursor(request.args.get("after")),
+                session=read_routing.session(),
+            )
+        return render_page(
+            "search.html",
+            recipes=recipes,
+            query=query,
+            category_name=category_name,
+            healthy=healthy,
+            categories=get_all_categories(),
+        )
+    except PyMongoError as e:
+        return handle_db_error(e)
+
+
+# What can I cook
+@app.route("/pantry")
+def pantry():
+    """
+    Rank recipes by how much of them the user's pantry covers.
+
+    Returns:
+        Response: Rendered pantry.html template with the pantry form and,
+                  when ingredients were given, the best covered recipes
+
+    Notes:
+        - Ingredients are given one per line or separated by commas
+        - The ranking is one aggregation served by the ingredients index;
+          at most RECIPES_PER_PAGE recipes are returned
+        - Staples such as salt and water are assumed to be at hand
+    """
+    ingredients = request.args.get("ingredients", "")
+    pantry_items = parse_ingredients(ingredients)
+
+    try:
+        recipes = None
+        if pantry_items:
+            recipes = match_pantry(
+                read_routing.database().recipes,
+                pantry_items,
+                projection=RECIPE_LIST_PROJECTION,
+                limit=app.config["RECIPES_PER_PAGE"],
+                session=read_routing.session(),
+            )
+        return render_template("pantry.html", recipes=recipes, ingredients=ingredients)
+    except PyMongoError as e:
+        return handle_db_error(e)
 
 
 # Register
@@ -142,7 +736,8 @@ def register():
 
     Notes:
         - Usernames are stored in lowercase
-        - Passwords are hashed before storage
+        - Duplicate usernames are rejected by the unique username index
+        - Passwords are hashed before storage, in the bounded hashing pool
         - Email addresses are stored in lowercase
         - Redirects to profile if user is already logged in
     """
@@ -155,15 +750,10 @@ def register():
             username = form.username.data.lower().strip()
             email = form.email.data.lower().strip()
 
-            existing_user = mongo.db.users.find_one({"username": username})
-            if existing_user:
-                flash(USERNAME_EXISTS_MSG)
-                return redirect(url_for("register"))
-
             new_user = {
                 "username": username,
                 "email": email,
-                "password": generate_password_hash(form.password.data),
+                "password": password_hasher.hash(form.password.data),
             }
 
             try:
@@ -171,6 +761,9 @@ def register():
                 session["user"] = username
                 flash(REGISTRATION_SUCCESS_MSG)
                 return redirect(url_for("profile", username=session["user"]))
+            except DuplicateKeyError:
+                flash(USERNAME_EXISTS_MSG)
+                return redirect(url_for("register"))
             except PyMongoError as e:
                 return handle_db_error(e)
 
@@ -245,6 +838,9 @@ def login():
         Response: On GET: login form
                  On POST success: redirect to user profile
                  On POST failure: redirect to login with error
+
+    Notes:
+        - Hashes made with older parameters are upgraded on success
     """
     if session.get("user"):
         return redirect(url_for("profile", username=session["user"]))
@@ -255,9 +851,11 @@ def login():
             {"username": form.username.data.lower().strip()}
         )
 
-        if existing_user and check_password_hash(
+        if existing_user and password_hasher.verify(
             existing_user["password"], form.password.data
         ):
+            if password_hasher.needs_rehash(existing_user["password"]):
+                rehash_password(existing_user, form.password.data)
             session["user"] = form.username.data.lower()
             flash(LOGIN_SUCCESS_MSG.format(form.username.data))
             return redirect(url_for("profile", username=session["user"]))
@@ -268,6 +866,29 @@ def login():
     return render_template("login.html", form=form)
 
 
+def rehash_password(user, password):
+    """
+    Replace a user's stored hash with one using the current parameters.
+
+    Args:
+        user (dict): User document holding the outdated hash
+        password (str): The plain text password that was just verified
+
+    Notes:
+        - Skipped when the hashing queue is full; retried on the next login
+        - Failures are logged and ignored; the old hash still works
+    """
+    try:
+        mongo.db.users.update_one(
+            {"_id": user["_id"], "password": user["password"]},
+            {"$set": {"password": password_hasher.hash(password)}},
+        )
+    except HashingBusy:
+        return
+    except PyMongoError as e:
+        app.logger.error("Password rehash failed: %s", str(e))
+
+
 # Profile
 @app.route("/profile/<username>")
 def profile(username):
@@ -288,19 +909,49 @@ def profile(username):
         - Validates user exists in database
         - Clears session if user not found
         - Handles database errors gracefully
+        - The user check, the page of recipes and every statistic come
+          from one aggregation, cached against the recipes version stamp
+          read in the same session
+        - Dashboards read from a secondary are only cached when the
+          session waited for the viewer's own latest write
+        - Further pages of recipes are addressed by the ``after`` cursor
     """
     if not session.get("user"):
         flash(PROFILE_ACCESS_ERROR_MSG)
         return redirect(url_for("login"))
 
     try:
-        user = mongo.db.users.find_one({"username": username})
-        if not user:
+        page_size = app.config["RECIPES_PER_PAGE"]
+        after = parse_cursor(request.args.get("after"))
+        db, db_session = read_routing.database(), read_routing.session()
+        versions = get_versions(db, "recipes", session=db_session)
+        dashboard = profile_cache.get(
+            username,
+            str(after or ""),
+            versions["recipes"],
+            lambda: load_profile(
+                db,
+                username,
+                RECIPE_LIST_PROJECTION,
+                page_size,
+                after,
+                session=db_session,
+            ),
+            store=read_routing.reads_own_writes(),
+        )
+        if not dashboard:
             session.pop("user")
             flash(USER_NOT_FOUND_MSG)
             return redirect(url_for("login"))
 
-        return render_template("profile.html", username=username)
+        return render_template(
+            "profile.html",
+            username=username,
+            dashboard=dashboard,
+            recipes=KeysetPage(
+                dashboard["recipes"], page_size, has_prev=after is not None
+            ),
+        )
 
     except PyMongoError as e:
         return handle_db_error(e)
@@ -353,21 +1004,40 @@ def add_recipe():
         # Input validation
         if not recipe_name or not recipe_description or not category_name:
             flash(RECIPE_ACCESS_ERROR_MSG)
-            all_categories = list(mongo.db.categories.find().sort("category_name", 1))
+            all_categories = get_all_categories()
             return render_template("add_recipe.html", categories=all_categories)
 
         try:
             healthy = "on" if request.form.get("healthy") else "off"
             recipe = {
+                "_id": ObjectId(),
                 "category_name": category_name,
                 "recipe_name": recipe_name,
                 "recipe_description": recipe_description,
-                "date_added": request.form.get("date_added"),
+                "ingredients": parse_ingredients(request.form.get("ingredients", "")),
+                "date_added": parse_date(request.form.get("date_added")),
                 "healthy": healthy,
                 "created_by": session["user"],
+                "revision": 1,
+                # Picked up by the next run of `flask recipes similar`
+                "similar_stale": True,
             }
+            image = store_recipe_image(recipe["_id"])
+            if image:
+                recipe["image"] = image
 
-            mongo.db.recipes.insert_one(recipe)
+            try:
+                mongo.db.recipes.insert_one(recipe)
+            except PyMongoError:
+                # Nothing refers to the stored upload without the recipe
+                if image:
+                    delete_images(mongo.db, image)
+                raise
+            if image:
+                queue_thumbnails(recipe["_id"], image, session["user"])
+            adjust_recipe_count(category_name, 1)
+            profile_cache.invalidate(session["user"])
+            bump_versions(mongo.db, "recipes", "categories")
             flash(RECIPE_ADDED_MSG)
             return redirect(url_for("get_recipes"))
 
@@ -375,7 +1045,7 @@ def add_recipe():
             return handle_db_error(e)
 
     try:
-        all_categories = list(mongo.db.categories.find().sort("category_name", 1))
+        all_categories = get_all_categories()
         form = CSRFProtectForm()
         return render_template("add_recipe.html", categories=all_categories, form=form)
     except PyMongoError as e:
@@ -393,35 +1063,70 @@ def edit_recipe(recipe_id):
 
     Returns:
         Response: On GET: edit form with recipe data
-                 On POST: redirect to recipes page
+                 On POST: redirect to recipes page, or back to the form if
+                 the recipe changed since it was loaded
+
+    Notes:
+        - The ownership check, the revision check and the update are one
+          find_one_and_update; the form carries the revision it was
+          loaded at, so a concurrent edit is rejected instead of lost
     """
-    recipe = mongo.db.recipes.find_one({"_id": ObjectId(recipe_id)})
     if not session.get("user"):
         flash(RECIPE_ACCESS_ERROR_MSG)
         return redirect(url_for("login"))
 
-    if (
-        session["user"].lower() != recipe["created_by"].lower()
-        and session["user"].lower() != "admin"
-    ):
-        flash(RECIPE_EDIT_ERROR_MSG)
-        return redirect(url_for("get_recipes"))
-
     if request.method == "POST":
         healthy = "on" if request.form.get("healthy") else "off"
         submit = {
             "category_name": request.form.get("category_name"),
             "recipe_name": request.form.get("recipe_name"),
             "recipe_description": request.form.get("recipe_description"),
-            "date_added": request.form.get("date_added"),
+            "ingredients": parse_ingredients(request.form.get("ingredients", "")),
+            "date_added": parse_date(request.form.get("date_added")),
             "healthy": healthy,
-            "created_by": recipe["created_by"],
+            "similar_stale": True,
         }
-        mongo.db.recipes.update_one({"_id": ObjectId(recipe_id)}, {"$set": submit})
+        query = recipe_write_filter(recipe_id)
+        # Recipes written before revisions were tracked have none, shown as 0
+        revision = request.form.get("revision", type=int)
+        query["revision"] = revision or {"$in": [0, None]}
+
+        image = store_recipe_image(query["_id"])
+        if image:
+            submit["image"] = image
+        try:
+            previous = mongo.db.recipes.find_one_and_update(
+                query,
+                {"$set": submit, "$inc": {"revision": 1}},
+                projection={"category_name": 1, "created_by": 1, "image": 1},
+            )
+        except PyMongoError:
+            if image:
+                delete_images(mongo.db, image)
+            raise
+        if previous is None:
+            if image:
+                delete_images(mongo.db, image)
+            return reject_recipe_write(recipe_id, RECIPE_EDIT_ERROR_MSG)
+
+        fragment_cache.evict(recipe_id)
+        profile_cache.invalidate(previous["created_by"])
+        if image:
+            queue_thumbnails(previous["_id"], image, previous["created_by"])
+            if previous.get("image"):
+                delete_images(mongo.db, previous["image"])
+        if submit["category_name"] != previous["category_name"]:
+            adjust_recipe_count(previous["category_name"], -1)
+            adjust_recipe_count(submit["category_name"], 1)
+        bump_versions(mongo.db, "recipes", "categories")
         flash(RECIPE_UPDATED_MSG)
         return redirect(url_for("get_recipes"))
 
-    all_categories = list(mongo.db.categories.find().sort("category_name", 1))
+    recipe = mongo.db.recipes.find_one(recipe_write_filter(recipe_id))
+    if recipe is None:
+        return reject_recipe_write(recipe_id, RECIPE_EDIT_ERROR_MSG)
+
+    all_categories = get_all_categories()
     form = CSRFProtectForm()
     return render_template(
         "edit_recipe.html", recipe=recipe, categories=all_categories, form=form
@@ -439,40 +1144,150 @@ def delete_recipe(recipe_id):
 
     Returns:
         Response: Redirect to recipes page with success/error message
+
+    Notes:
+        - The ownership check and the delete are one find_one_and_delete
     """
     if not session.get("user"):
         flash(RECIPE_ACCESS_ERROR_MSG)
         return redirect(url_for("login"))
 
-    recipe = mongo.db.recipes.find_one({"_id": ObjectId(recipe_id)})
-    if not recipe:
-        flash(RECIPE_NOT_FOUND_MSG)
-        return redirect(url_for("get_recipes"))
-
-    if (
-        session["user"].lower() != recipe["created_by"].lower()
-        and session["user"].lower() != "admin"
-    ):
-        flash(RECIPE_DELETE_ERROR_MSG)
-        return redirect(url_for("get_recipes"))
-
-    mongo.db.recipes.delete_one({"_id": ObjectId(recipe_id)})
+    recipe = mongo.db.recipes.find_one_and_delete(
+        recipe_write_filter(recipe_id),
+        projection={"category_name": 1, "created_by": 1, "image": 1},
+    )
+    if recipe is None:
+        return reject_recipe_write(recipe_id, RECIPE_DELETE_ERROR_MSG)
+
+    fragment_cache.evict(recipe_id)
+    profile_cache.invalidate(recipe["created_by"])
+    if recipe.get("image"):
+        delete_images(mongo.db, recipe["image"])
+    adjust_recipe_count(recipe["category_name"], -1)
+    bump_versions(mongo.db, "recipes", "categories")
     flash(RECIPE_DELETED_MSG)
     return redirect(url_for("get_recipes"))
 
 
+# Serve a recipe image
+@app.route("/images/<file_id>")
+def recipe_image(file_id):
+    """
+    Stream an image or thumbnail from GridFS.
+
+    Args:
+        file_id (str): GridFS id of the image
+
+    Returns:
+        Response: The image, a 206 partial response for Range requests,
+                  304 when the client's copy is current, or 404
+
+    Notes:
+        - The file is streamed from GridFS chunk by chunk, never buffered
+        - Stored images never change, so the id is a strong ETag and the
+          response may be cached for a year
+    """
+    try:
+        image = image_bucket(mongo.db).open_download_stream(ObjectId(file_id))
+    except (InvalidId, NoFile):
+        return page_not_found(None)
+    except PyMongoError as e:
+        app.logger.error("Database error: %s", str(e))
+        return SERVER_BUSY_MSG, 503, {"Retry-After": "1"}
+
+    response = app.response_class(
+        wrap_file(request.environ, image),
+        mimetype=(image.metadata or {}).get("content_type", "application/octet-stream"),
+        direct_passthrough=True,
+    )
+    response.content_length = image.length
+    response.last_modified = image.upload_date
+    response.set_etag(file_id)
+    response.accept_ranges = "bytes"
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(
+        request, accept_ranges=True, complete_length=image.length
+    )
+
+
+# Count a recipe view
+@app.route("/recipes/<recipe_id>/view", methods=["POST"])
+def record_view(recipe_id):
+    """
+    Count a view of a recipe's details, sent when they are opened.
+
+    Args:
+        recipe_id (str): MongoDB ObjectId of the recipe
+
+    Returns:
+        Response: Empty 204 response, or 404 for a malformed id
+
+    Notes:
+        - The view is buffered and written later in bulk, so the request
+          never touches the database
+    """
+    try:
+        view_counter.record_recipe(ObjectId(recipe_id))
+    except InvalidId:
+        return page_not_found(None)
+    return "", 204
+
+
+# Most viewed recipes
+@app.route("/top_recipes")
+@admin_required
+def top_recipes():
+    """
+    Display the most viewed recipes and categories.
+
+    Returns:
+        Response: Rendered top_recipes.html template
+
+    Notes:
+        - Recipes are read through the views index, most viewed first
+        - Counts lag behind by up to VIEW_FLUSH_INTERVAL seconds, as each
+          worker buffers the views it has seen
+    """
+    try:
+        recipes = (
+            mongo.db.recipes.find(
+                {"views": {"$gt": 0}},
+                {"recipe_name": 1, "category_name": 1, "created_by": 1, "views": 1},
+            )
+            .sort("views", -1)
+            .limit(app.config["RECIPES_PER_PAGE"])
+        )
+        category_list = mongo.db.categories.find(
+            {"views": {"$gt": 0}}, {"category_name": 1, "views": 1}
+        ).sort("views", -1)
+        return render_template(
+            "top_recipes.html", recipes=list(recipes), categories=list(category_list)
+        )
+    except PyMongoError as e:
+        return handle_db_error(e)
+
+
 # Manage Categories
 @app.route("/categories")
 @admin_required
+@conditional_get("categories")
 def categories():
     """
     Display all recipe categories.
 
     Returns:
         Response: Rendered categories.html template with all categories
+
+    Notes:
+        - The cached list is checked against the version stamp the ETag is
+          built from, so another worker's write is never served under the
+          newer ETag with the older list
     """
     try:
-        category_list = list(mongo.db.categories.find().sort("category_name", 1))
+        versions = g.get("collection_versions") or {}
+        category_list = get_all_categories(versions.get("categories"))
         return render_template("categories.html", categories=category_list)
     except PyMongoError as e:
         return handle_db_error(e)
@@ -489,6 +1304,9 @@ def add_category():
         Response: On GET: category creation form
                  On POST success: redirect to categories page
                  On POST failure: return to form with error
+
+    Notes:
+        - Duplicate names are rejected by the unique category_name index
     """
     if request.method == "POST":
         category_name = request.form.get("category_name", "").strip()
@@ -498,18 +1316,16 @@ def add_category():
             return redirect(url_for("add_category"))
 
         try:
-            existing_category = mongo.db.categories.find_one(
-                {"category_name": category_name}
-            )
-            if existing_category:
-                flash(CATEGORY_EXISTS_ERROR_MSG)
-                return redirect(url_for("add_category"))
-
-            category = {"category_name": category_name}
+            category = {"category_name": category_name, "recipe_count": 0}
             mongo.db.categories.insert_one(category)
+            category_cache.invalidate()
+            bump_versions(mongo.db, "categories")
             flash(CATEGORY_ADDED_MSG)
             return redirect(url_for("categories"))
 
+        except DuplicateKeyError:
+            flash(CATEGORY_EXISTS_ERROR_MSG)
+            return redirect(url_for("add_category"))
         except PyMongoError as e:
             return handle_db_error(e)
 
@@ -533,6 +1349,8 @@ def edit_category(category_id):
     if request.method == "POST":
         submit = {"category_name": request.form.get("category_name")}
         mongo.db.categories.update_one({"_id": ObjectId(category_id)}, {"$set": submit})
+        category_cache.invalidate()
+        bump_versions(mongo.db, "categories")
         flash(CATEGORY_UPDATED_MSG)
         return redirect(url_for("categories"))
     category = mongo.db.categories.find_one({"_id": ObjectId(category_id)})
@@ -555,7 +1373,10 @@ def delete_category(category_id):
 
     Notes:
         - Only administrators can delete categories
-        - Categories containing recipes cannot be deleted
+        - Categories containing recipes cannot be deleted, checked against
+          the category's recipe_count rather than the recipes collection,
+          or against the recipes collection for a category that has no
+          count yet
         - Displays appropriate flash messages for success/failure
     """
     try:
@@ -570,25 +1391,140 @@ def delete_category(category_id):
             flash(CATEGORY_NOT_FOUND_MSG)
             return redirect(url_for("categories"))
 
-        # Check for recipes using this category
-        recipes = list(
-            mongo.db.recipes.find({"category_name": category["category_name"]})
+        # Categories created before recipe counting have no recipe_count
+        # until `db init` fills it in, so look for one of their recipes
+        in_use = "recipe_count" not in category and mongo.db.recipes.find_one(
+            {"category_name": category["category_name"]}, {"_id": 1}
         )
-        if recipes:
+        # Only delete while the maintained recipe counter is zero, so a
+        # recipe added after the lookup still blocks the delete
+        deleted = (
+            not in_use
+            and mongo.db.categories.delete_one(
+                {"_id": category["_id"], "recipe_count": {"$not": {"$gt": 0}}}
+            ).deleted_count
+        )
+        if not deleted:
             flash(
                 CATEGORY_DELETE_ERROR_MSG.format(
-                    category_name=category["category_name"], recipe_count=len(recipes)
+                    category_name=category["category_name"],
+                    recipe_count=category.get("recipe_count", 0),
                 )
             )
             return redirect(url_for("categories"))
 
-        mongo.db.categories.delete_one({"_id": ObjectId(category_id)})
+        category_cache.invalidate()
+        bump_versions(mongo.db, "categories")
         flash(CATEGORY_DELETED_MSG)
     except PyMongoError as e:
         return handle_db_error(e)
     return redirect(url_for("categories"))
 
 
+# Metrics
+@app.route("/metrics")
+@admin_required
+def metrics():
+    """
+    Expose request, database and cache metrics for Prometheus.
+
+    Returns:
+        Response: Prometheus text exposition of this worker's metrics
+
+    Notes:
+        - Each server worker keeps its own metrics, so scrape every worker
+          or aggregate the series by instance
+    """
+    category_stats = category_cache.stats()
+    fragment_stats = fragment_cache.stats()
+    profile_stats = profile_cache.stats()
+    facet_stats = facet_cache.stats()
+    view_stats = view_counter.stats()
+    body = request_metrics.render(
+        (
+            (
+                "flavorvault_category_cache_hits_total",
+                "counter",
+                "Category list cache hits.",
+                category_stats["hits"],
+            ),
+            (
+                "flavorvault_category_cache_misses_total",
+                "counter",
+                "Category list cache misses.",
+                category_stats["misses"],
+            ),
+            (
+                "flavorvault_fragment_cache_hits_total",
+                "counter",
+                "Recipe fragment cache hits.",
+                fragment_stats["hits"],
+            ),
+            (
+                "flavorvault_fragment_cache_misses_total",
+                "counter",
+                "Recipe fragment cache misses.",
+                fragment_stats["misses"],
+            ),
+            (
+                "flavorvault_profile_cache_hits_total",
+                "counter",
+                "Profile dashboard cache hits.",
+                profile_stats["hits"],
+            ),
+            (
+                "flavorvault_profile_cache_misses_total",
+                "counter",
+                "Profile dashboard cache misses.",
+                profile_stats["misses"],
+            ),
+            (
+                "flavorvault_facet_cache_hits_total",
+                "counter",
+                "Recipe list facet count cache hits.",
+                facet_stats["hits"],
+            ),
+            (
+                "flavorvault_facet_cache_misses_total",
+                "counter",
+                "Recipe list facet count cache misses.",
+                facet_stats["misses"],
+            ),
+            (
+                "flavorvault_views_flushed_total",
+                "counter",
+                "Recipe and category views written to the database.",
+                view_stats["flushed"],
+            ),
+            (
+                "flavorvault_views_dropped_total",
+                "counter",
+                "Views dropped because the view buffer was full.",
+                view_stats["dropped"],
+            ),
+            (
+                "flavorvault_view_flush_failures_total",
+                "counter",
+                "View buffer bulk writes that failed.",
+                view_stats["failures"],
+            ),
+            (
+                "flavorvault_views_buffered",
+                "gauge",
+                "Views waiting in the buffer.",
+                view_stats["buffered"],
+            ),
+            (
+                "flavorvault_fragment_cache_size",
+                "gauge",
+                "Characters held in the recipe fragment cache.",
+                fragment_stats["size"],
+            ),
+        )
+    )
+    return make_response(body, 200, {"Content-Type": "text/plain; version=0.0.4"})
+
+
 # 404 Error
 @app.errorhandler(404)
 def page_not_found(_):
@@ -604,10 +1540,343 @@ def page_not_found(_):
     return render_template("404.html"), 404
 
 
+# Upload too large
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(_):
+    """
+    Send oversized uploads back to the form they came from.
+
+    Args:
+        _ (Exception): The RequestEntityTooLarge error (unused)
+
+    Returns:
+        Response: Redirect to the requested page with an error message
+    """
+    flash(IMAGE_TOO_LARGE_MSG)
+    return redirect(request.url)
+
+
+# Hashing queue full
+@app.errorhandler(HashingBusy)
+def hashing_busy(_):
+    """
+    Refuse logins and registrations while the hashing queue is full.
+
+    Args:
+        _ (Exception): The HashingBusy error (unused)
+
+    Returns:
+        tuple: Plain text message, 503 status code and Retry-After header
+    """
+    return SERVER_BUSY_MSG, 503, {"Retry-After": "1"}
+
+
+# Database maintenance commands
+@app.cli.group("db")
+def db_cli():
+    """Database maintenance commands."""
+    # The CLI may have loaded the module without going through wsgi.py
+    create_app()
+
+
+@db_cli.command("init")
+@click.option(
+    "--explain/--no-explain",
+    default=True,
+    help="Report hot queries that still scan a whole collection.",
+)
+def db_init(explain):
+    """
+    Create the indexes the application relies on.
+
+    Also fills in the recipe_count of categories that predate it. Safe to
+    run on every deploy: existing indexes and counts are left untouched.
+    """
+    try:
+        for collection, names in ensure_indexes(mongo.db).items():
+            click.echo(f"{collection}: {', '.join(names)}")
+    except OperationFailure as e:
+        raise click.ClickException(f"Index creation failed: {e}") from e
+
+    filled = backfill_recipe_counts(mongo.db)
+    if filled:
+        category_cache.invalidate()
+        bump_versions(mongo.db, "categories")
+        click.echo(f"Recipe counts filled in for {filled} categories")
+
+    if explain:
+        report_collection_scans()
+
+
+@db_cli.command("check-reads")
+def db_check_reads():
+    """
+    Check that routed reads observe the writes made just before them.
+
+    Writes a marker document, reads it back with the configured read
+    preference in a causally consistent session and reports the server
+    that answered. Works against a single-host replica set, where
+    secondaryPreferred falls back to the primary.
+    """
+    description = mongo.cx.topology_description
+    click.echo(f"Topology: {description.topology_type_name}")
+    click.echo(f"Read preference: {read_routing.read_preference!r}")
+    click.echo(f"Read routes: {', '.join(sorted(read_routing.read_routes))}")
+
+    collection = mongo.db.read_routing_check
+    routed = collection.with_options(read_preference=read_routing.read_preference)
+    try:
+        with mongo.cx.start_session(causal_consistency=True) as db_session:
+            marker = collection.insert_one({}, session=db_session).inserted_id
+            cursor = routed.find({"_id": marker}, session=db_session)
+            found = next(cursor, None) is not None
+            click.echo(f"Read served by {cursor.address}")
+            collection.delete_one({"_id": marker}, session=db_session)
+    except PyMongoError as e:
+        raise click.ClickException(f"Read check failed: {e}") from e
+    if not found:
+        raise click.ClickException("The routed read missed the preceding write")
+    click.echo("The routed read saw the preceding write")
+
+
+@db_cli.command("migrate-dates")
+@click.option(
+    "--batch-size", default=1000, show_default=True, help="Recipes per batch."
+)
+def db_migrate_dates(batch_size):
+    """
+    Convert recipe dates stored as text into BSON dates.
+
+    Safe to interrupt and run again: it continues with the recipes that
+    still hold text.
+    """
+    converted, unparseable = migrate_recipe_dates(mongo.db, batch_size)
+    bump_versions(mongo.db, "recipes")
+    click.echo(f"Converted {converted} recipe dates")
+    if unparseable:
+        click.echo(f"{unparseable} dates were not recognised; see date_added_text")
+
+
+def report_collection_scans():
+    """
+    Log every hot query whose winning plan is a collection scan.
+
+    Returns:
+        list: The (collection, filter) pairs that scan a whole collection
+    """
+    scans = find_collection_scans(mongo.db)
+    for collection, query in scans:
+        app.logger.warning("Collection scan on %s for %s", collection, query)
+    return scans
+
+
+@db_cli.command("repair-counts")
+def db_repair_counts():
+    """
+    Rebuild every category's recipe_count from the recipes collection.
+
+    Use after imports or manual edits that bypassed the application.
+    """
+    updated = rebuild_recipe_counts(mongo.db)
+    category_cache.invalidate()
+    bump_versions(mongo.db, "categories")
+    click.echo(f"Recipe counts rebuilt for {updated} categories")
+
+
+# Bulk recipe commands
+@app.cli.group("recipes")
+def recipes_cli():
+    """Bulk recipe import and export, and similar recipe updates."""
+    # The CLI may have loaded the module without going through wsgi.py
+    create_app()
+
+
+@recipes_cli.command("import")
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--format", "fmt", type=click.Choice(FORMATS), help="Defaults to the extension."
+)
+@click.option(
+    "--batch-size", default=1000, show_default=True, help="Recipes per insert."
+)
+@click.option(
+    "--created-by", default="admin", show_default=True, help="Owner for unowned rows."
+)
+def recipes_import(source, fmt, batch_size, created_by):
+    """
+    Import recipes from a JSON Lines or CSV file ("-" for stdin).
+
+    Rows naming a category that does not exist, and lines that are not
+    valid JSON, are skipped.
+    """
+    fmt = fmt or detect_format(source.name)
+    try:
+        inserted, skipped = import_recipes(
+            mongo.db,
+            read_records(source, fmt),
+            batch_size=batch_size,
+            created_by=created_by,
+        )
+    except PyMongoError as e:
+        raise click.ClickException(
+            f"Import failed: {e}. Recipes in earlier batches were kept; "
+            "run `flask --app app db repair-counts` if the failed batch was "
+            "partly written"
+        ) from e
+    finally:
+        category_cache.invalidate()
+    click.echo(f"Imported {inserted} recipes, skipped {skipped}")
+
+
+@recipes_cli.command("export")
+@click.argument("destination", type=click.File("w", encoding="utf-8"), default="-")
+@click.option(
+    "--format", "fmt", type=click.Choice(FORMATS), help="Defaults to the extension."
+)
+@click.option(
+    "--batch-size", default=1000, show_default=True, help="Recipes per round trip."
+)
+def recipes_export(destination, fmt, batch_size):
+    """Export every recipe to a JSON Lines or CSV file (default stdout)."""
+    fmt = fmt or detect_format(destination.name)
+    written = export_recipes(mongo.db, destination, fmt, batch_size=batch_size)
+    click.echo(f"Exported {written} recipes", err=True)
+
+
+@recipes_cli.command("similar")
+@click.option("--all", "full", is_flag=True, help="Rescore every recipe.")
+@click.option(
+    "--batch-size", default=256, show_default=True, help="Recipes per matrix product."
+)
+def recipes_similar(full, batch_size):
+    """
+    Recompute the similar recipes of added and edited recipes.
+
+    Run it on a schedule; --all also refreshes the term weights.
+    """
+    updated = update_similar(mongo.db, full=full, batch_size=batch_size)
+    if updated:
+        bump_versions(mongo.db, "recipes")
+    click.echo(f"Similar recipes updated for {updated} recipes")
+
+
+# Image maintenance commands
+@app.cli.group("images")
+def images_cli():
+    """Recipe image maintenance."""
+    # The CLI may have loaded the module without going through wsgi.py
+    create_app()
+
+
+@images_cli.command("thumbnails")
+def images_thumbnails():
+    """Generate thumbnails for images that do not have them yet."""
+    missing = mongo.db.recipes.find(
+        {"image.original": {"$exists": True}, "image.thumbnails.small": None},
+        {"image.original": 1, "created_by": 1},
+    )
+    count = 0
+    for recipe in missing:
+        process_recipe_image(
+            recipe["_id"], recipe["image"]["original"], recipe["created_by"]
+        )
+        count += 1
+    click.echo(f"Processed {count} images")
+
+
+# Static asset build
+@app.cli.group("assets")
+def assets_cli():
+    """Static asset build."""
+
+
+@assets_cli.command("build")
+@click.option(
+    "--vendor/--no-vendor",
+    default=True,
+    show_default=True,
+    help="Download missing third-party assets first.",
+)
+def assets_build(vendor):
+    """Write fingerprinted, precompressed copies of the static files."""
+    if vendor:
+        try:
+            downloaded = vendor_assets(app.static_folder)
+        except (OSError, ValueError) as e:
+            raise click.ClickException(f"Vendoring failed: {e}") from e
+        click.echo(f"Downloaded {len(downloaded)} vendor assets")
+    manifest = build_assets(app.static_folder)
+    click.echo(f"Built {len(manifest)} assets")
+
+
+def mongo_client_options():
+    """
+    Collect MongoClient options from the environment.
+
+    Returns:
+        dict: Keyword arguments for MongoClient, only for variables that are set
+    """
+    return {
+        option: int(os.environ[variable])
+        for option, variable in MONGO_CLIENT_OPTIONS.items()
+        if os.environ.get(variable)
+    }
+
+
+def create_app(config=None):
+    """
+    Configure the application and connect its extensions.
+
+    Args:
+        config (dict, optional): Config values overriding the environment
+
+    Returns:
+        Flask: The configured application
+
+    Notes:
+        - Call once per process, after any fork: the WSGI entry point does
+          this when each server worker imports it, so every worker gets its
+          own MongoClient and connection pool
+        - The client connects on first use, not when it is created
+        - Calling again in the same process returns the app unchanged
+    """
+    if mongo.cx is not None:
+        return app
+
+    app.config.update(config or {})
+    mongo.init_app(
+        app,
+        connect=False,
+        event_listeners=[request_metrics.listener, read_routing.listener],
+        **mongo_client_options(),
+    )
+    read_routing.init_app(app)
+    view_counter.init_app(app)
+    category_cache.ttl = app.config["CATEGORY_CACHE_TTL"]
+    if app.config["COMPRESSION_ENABLED"]:
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            min_size=app.config["COMPRESSION_MIN_SIZE"],
+            flush_size=app.config["COMPRESSION_FLUSH_SIZE"],
+            gzip_level=app.config["COMPRESSION_GZIP_LEVEL"],
+            brotli_quality=app.config["COMPRESSION_BROTLI_QUALITY"],
+        )
+
+    if app.config["ENSURE_INDEXES_ON_STARTUP"]:
+        try:
+            ensure_indexes(mongo.db)
+            backfill_recipe_counts(mongo.db)
+            report_collection_scans()
+        except PyMongoError as e:
+            app.logger.error("Index bootstrap failed: %s", str(e))
+
+    return app
+
+
 # Run the app
 if __name__ == "__main__":
     debug = os.environ.get("DEBUG", "False").lower() == "true"
-    app.run(
+    create_app().run(
         host=os.environ.get("IP", "0.0.0.0"),
         port=int(os.environ.get("PORT", "5000")),
         debug=debug,
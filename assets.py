@@ -0,0 +1,329 @@
+"""
+Fingerprinted, precompressed static assets for FlavorVault.
+
+``flask assets build`` downloads the third-party CSS, JavaScript and fonts
+into ``static/vendor`` and copies every static file into ``static/dist``
+under a content-hashed name, next to gzip and (when the optional
+``brotli`` package is installed) brotli variants. A manifest maps each
+original name to its hashed one.
+
+At runtime ``url_for('static', filename=...)`` emits the hashed name from
+the manifest and the static view serves the best precompressed variant
+the client accepts with ``Cache-Control: immutable``, so repeat visits
+make no asset requests at all. Without a build, names are left unchanged
+and the vendor assets are loaded from their CDNs.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from urllib.request import urlopen
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+DIST_FOLDER = "dist"
+VENDOR_FOLDER = "vendor"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_FONT_AWESOME = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.7.2"
+_MATERIALIZE = "https://cdnjs.cloudflare.com/ajax/libs/materialize/1.0.0"
+
+# Vendored file (relative to static/vendor) -> (source URL, SRI hash or None)
+VENDOR_ASSETS = {
+    "fontawesome/css/all.min.css": (
+        f"{_FONT_AWESOME}/css/all.min.css",
+        "sha512-Evv84Mr4kqVGRNSgIGL/F/aIDqQb7xQ2vcrdIwxfjThSH8CSR7PBEakCr51Ck+w+"
+        "/U6swU2Im1vVX0SVk9ABhg==",
+    ),
+    **{
+        f"fontawesome/webfonts/{font}.{ext}": (
+            f"{_FONT_AWESOME}/webfonts/{font}.{ext}",
+            None,
+        )
+        for font in (
+            "fa-brands-400",
+            "fa-regular-400",
+            "fa-solid-900",
+            "fa-v4compatibility",
+        )
+        for ext in ("woff2", "ttf")
+    },
+    "materialize/css/materialize.min.css": (
+        f"{_MATERIALIZE}/css/materialize.min.css",
+        None,
+    ),
+    "materialize/js/materialize.min.js": (
+        f"{_MATERIALIZE}/js/materialize.min.js",
+        None,
+    ),
+    "jquery/jquery.min.js": (
+        "https://code.jquery.com/jquery-3.7.1.min.js",
+        "sha256-/JqT3SQfawRcv/BIHPThkBvs0OEvtFFmqPF/lYI/Cxo=",
+    ),
+}
+
+# Types worth precompressing; images and woff2 fonts are already compressed
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".webmanifest", ".ttf", ".txt")
+# Source files that are not served to browsers
+EXCLUDED = (".test.js",)
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def check_integrity(data, integrity):
+    """
+    Verify downloaded bytes against a Subresource Integrity hash.
+
+    Args:
+        data (bytes): The downloaded file
+        integrity (str): ``<algorithm>-<base64 digest>``, or None to skip
+
+    Raises:
+        ValueError: If the digest does not match
+    """
+    if not integrity:
+        return
+    algorithm, expected = integrity.split("-", 1)
+    actual = base64.b64encode(hashlib.new(algorithm, data).digest()).decode()
+    if actual != expected:
+        raise ValueError(f"Integrity check failed ({algorithm})")
+
+
+def vendor_assets(static_folder, fetch=urlopen):
+    """
+    Download every VENDOR_ASSETS file that is not already present.
+
+    Args:
+        static_folder (str): The application's static folder
+        fetch (callable, optional): Opens a URL and returns a readable
+                                    response. Defaults to urlopen.
+
+    Returns:
+        list: Vendored paths that were downloaded
+    """
+    downloaded = []
+    for name, (url, integrity) in VENDOR_ASSETS.items():
+        path = os.path.join(static_folder, VENDOR_FOLDER, name)
+        if os.path.exists(path):
+            continue
+        with fetch(url) as response:
+            data = response.read()
+        try:
+            check_integrity(data, integrity)
+        except ValueError as e:
+            raise ValueError(f"{url}: {e}") from e
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as output:
+            output.write(data)
+        downloaded.append(name)
+    return downloaded
+
+
+def hashed_name(name, data):
+    """
+    Insert a content hash before a file's extension.
+
+    Args:
+        name (str): Path relative to the static folder, e.g. ``css/style.css``
+        data (bytes): The file's contents
+
+    Returns:
+        str: e.g. ``css/style.3f9a1c0b2d4e.css``
+    """
+    stem, ext = posixpath.splitext(name)
+    if stem.endswith(".min"):
+        stem, ext = stem[:-4], ".min" + ext
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _rewrite_css_urls(name, data, manifest):
+    """Point relative url() references in a stylesheet at hashed files."""
+    directory = posixpath.dirname(name)
+    target_directory = posixpath.dirname(posixpath.join(DIST_FOLDER, name))
+
+    def replace(match):
+        quote, reference = match.groups()
+        # Keep any ?query or #fragment, e.g. the SVG font anchors
+        path = re.split(r"[?#]", reference, maxsplit=1)[0]
+        if not path or ":" in path or path.startswith("/"):
+            return match.group(0)
+        target = manifest.get(posixpath.normpath(posixpath.join(directory, path)))
+        if target is None:
+            return match.group(0)
+        relative = posixpath.relpath(target, target_directory)
+        return f"url({quote}{relative}{reference[len(path):]}{quote})"
+
+    return _CSS_URL.sub(replace, data.decode("utf-8")).encode("utf-8")
+
+
+def _write_compressed(path, data):
+    """Write .gz and .br variants of a file when they are smaller."""
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as output:
+                output.write(compressed)
+
+
+def build_assets(static_folder):
+    """
+    Copy every static file into the dist folder under a hashed name.
+
+    Args:
+        static_folder (str): The application's static folder
+
+    Returns:
+        dict: The manifest, original name to hashed name, both relative
+              to the static folder
+
+    Notes:
+        - The dist folder is rebuilt from scratch on each run
+        - Stylesheets are processed last so their url() references to
+          fonts and images can be rewritten to the hashed names
+    """
+    dist = os.path.join(static_folder, DIST_FOLDER)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    names = []
+    for root, directories, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            directories[:] = [name for name in directories if name != DIST_FOLDER]
+        for filename in files:
+            name = os.path.relpath(os.path.join(root, filename), static_folder)
+            name = name.replace(os.sep, "/")
+            if not name.endswith(EXCLUDED):
+                names.append(name)
+    names.sort(key=lambda name: (name.endswith(".css"), name))
+
+    manifest = {}
+    for name in names:
+        with open(os.path.join(static_folder, name), "rb") as source:
+            data = source.read()
+        if name.endswith(".css"):
+            data = _rewrite_css_urls(name, data, manifest)
+        target = posixpath.join(DIST_FOLDER, hashed_name(name, data))
+        manifest[name] = target
+
+        path = os.path.join(static_folder, target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as output:
+            output.write(data)
+        if name.endswith(COMPRESSIBLE):
+            _write_compressed(path, data)
+
+    with open(os.path.join(dist, MANIFEST_NAME), "w", encoding="utf-8") as output:
+        json.dump(manifest, output, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    """
+    Read the manifest written by build_assets.
+
+    Args:
+        static_folder (str): The application's static folder
+
+    Returns:
+        dict: Original name to hashed name, empty when nothing was built
+    """
+    try:
+        with open(
+            os.path.join(static_folder, DIST_FOLDER, MANIFEST_NAME), encoding="utf-8"
+        ) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+
+
+class StaticAssets:
+    """
+    Flask extension serving the fingerprinted build.
+
+    Attributes:
+        manifest (dict): Original name to hashed name
+        vendored (bool): Whether the build includes the vendor assets
+        fingerprint (str): Digest of the manifest, changing whenever a
+                           build renames any asset; salts page ETags
+    """
+
+    def __init__(self):
+        self.manifest = {}
+        self.vendored = False
+        self.fingerprint = ""
+        self._static_folder = None
+
+    def init_app(self, app):
+        """
+        Load the manifest and hook url_for and the static view.
+
+        Args:
+            app (Flask): The application whose static folder was built
+        """
+        self._static_folder = app.static_folder
+        self.manifest = load_manifest(app.static_folder)
+        self.fingerprint = hashlib.sha1(
+            json.dumps(self.manifest, sort_keys=True).encode()
+        ).hexdigest()
+        self.vendored = all(
+            f"{VENDOR_FOLDER}/{name}" in self.manifest for name in VENDOR_ASSETS
+        )
+        app.url_defaults(self._hashed_url)
+        app.view_functions["static"] = self.serve
+        app.context_processor(lambda: {"assets_vendored": self.vendored})
+
+    def _hashed_url(self, endpoint, values):
+        """Swap static filenames for their hashed names in url_for."""
+        if endpoint == "static":
+            hashed = self.manifest.get(values.get("filename"))
+            if hashed:
+                values["filename"] = hashed
+
+    def serve(self, filename):
+        """
+        Serve a static file, precompressed and immutable when fingerprinted.
+
+        Args:
+            filename (str): Path relative to the static folder
+
+        Returns:
+            Response: The file, or its brotli/gzip variant with
+                      Content-Encoding set when the client accepts it
+        """
+        if not filename.startswith(DIST_FOLDER + "/"):
+            return send_from_directory(self._static_folder, filename)
+
+        encoding, suffix = None, ""
+        for candidate, extension in (("br", ".br"), ("gzip", ".gz")):
+            if candidate in request.accept_encodings and os.path.isfile(
+                os.path.join(self._static_folder, filename + extension)
+            ):
+                encoding, suffix = candidate, extension
+                break
+
+        response = send_from_directory(
+            self._static_folder,
+            filename + suffix,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            max_age=IMMUTABLE_MAX_AGE,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,113 @@
+"""
+Benchmark response compression on a large recipe list.
+
+Seeds a database, renders the recipe list with a large page size, then
+compresses the captured page with every gzip level and a range of brotli
+qualities. Each setting is run both one-shot and over the streamed
+chunks with a flush every --flush-size bytes, as CompressionMiddleware
+does, and reports bytes on the wire, compression ratio and CPU time per
+page. --flush-size 1 shows the cost of flushing every template chunk.
+
+Usage:
+    BENCH_MONGO_URI=mongodb://localhost:27017 python benchmarks/compression_benchmark.py
+    python benchmarks/compression_benchmark.py --memory --page-size 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from compression import BrotliEncoder, GzipEncoder, brotli, compress_chunks
+from route_benchmark import connect, seed
+
+GZIP_LEVELS = range(1, 10)
+BROTLI_QUALITIES = (0, 1, 2, 4, 5, 6, 9, 11)
+
+
+def parse_args():
+    """Read command line options."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--recipes", type=int, default=10_000, help="Seeded volume.")
+    parser.add_argument("--page-size", type=int, default=500, help="Recipes shown.")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per setting.")
+    parser.add_argument(
+        "--flush-size", type=int, default=8192, help="Bytes between flushes."
+    )
+    parser.add_argument("--memory", action="store_true", help="Use mongomock.")
+    return parser.parse_args()
+
+
+def capture_page(app, page_size):
+    """Render the recipe list uncompressed and return its body chunks."""
+    app.config["RECIPES_PER_PAGE"] = page_size
+    response = app.test_client().get("/")
+    chunks = [chunk for chunk in response.iter_encoded() if chunk]
+    response.close()
+    return chunks
+
+
+def measure(make_encoder, chunks, repeat, flush_size):
+    """
+    Compress the page repeatedly and summarise size and CPU time.
+
+    Returns:
+        tuple: (one-shot bytes, streamed bytes, one-shot CPU ms, streamed CPU ms)
+    """
+    body = b"".join(chunks)
+    results = []
+    for parts in ([body], chunks):
+        started = time.process_time()
+        for _ in range(repeat):
+            compressed = compress_chunks(make_encoder(), parts, flush_size)
+            size = sum(len(data) for data in compressed)
+        results.append((size, (time.process_time() - started) / repeat * 1000))
+    (whole_size, whole_ms), (stream_size, stream_ms) = results
+    return whole_size, stream_size, whole_ms, stream_ms
+
+
+def main():
+    """Seed, capture the page and compare compression settings."""
+    args = parse_args()
+    app, db = connect(args.memory)
+    seed(db, args.recipes, 1, random.Random(42))
+    chunks = capture_page(app, args.page_size)
+    original = sum(len(chunk) for chunk in chunks)
+    print(
+        f"Recipe list of {args.page_size} recipes: {original:,} bytes"
+        f" in {len(chunks)} streamed chunks\n"
+    )
+
+    settings = [
+        (f"gzip -{level}", lambda level=level: GzipEncoder(level))
+        for level in GZIP_LEVELS
+    ]
+    if brotli is not None:
+        settings += [
+            (f"br q{quality}", lambda quality=quality: BrotliEncoder(quality))
+            for quality in BROTLI_QUALITIES
+        ]
+    else:
+        print("brotli is not installed; only gzip is measured\n")
+
+    print(
+        f"{'setting':<10} {'bytes':>10} {'ratio':>7} {'cpu ms':>8}"
+        f" {'streamed':>10} {'ratio':>7} {'cpu ms':>8}"
+    )
+    for name, make_encoder in settings:
+        whole, streamed, whole_ms, stream_ms = measure(
+            make_encoder, chunks, args.repeat, args.flush_size
+        )
+        print(
+            f"{name:<10} {whole:>10,} {original / whole:>7.2f} {whole_ms:>8.2f}"
+            f" {streamed:>10,} {original / streamed:>7.2f} {stream_ms:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Load test the production server at increasing worker counts.
+
+Starts gunicorn with the repository's gunicorn.conf.py for each worker
+count, drives concurrent GET requests at the home page for a fixed time,
+and prints requests per second and latency percentiles so throughput
+scaling with WEB_CONCURRENCY is visible.
+
+Usage:
+    MONGO_URI=mongodb://localhost:27017/flavorvault SECRET_KEY=dev \\
+        python benchmarks/load_test.py
+
+Requires gunicorn and a reachable MongoDB holding some recipes.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+WORKER_COUNTS = (1, 2, 4, 8)
+CLIENTS = int(os.environ.get("BENCH_CLIENTS", "32"))
+DURATION = float(os.environ.get("BENCH_DURATION", "10"))
+PORT = int(os.environ.get("BENCH_PORT", "5055"))
+PATH = os.environ.get("BENCH_PATH", "/")
+
+
+def wait_for_port(port, timeout=15.0):
+    """Block until something accepts connections on localhost:port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start on port {port}")
+
+
+def drive(url):
+    """Send requests from CLIENTS threads for DURATION seconds."""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+
+    def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=10) as response:
+                    response.read()
+            except OSError:
+                with lock:
+                    errors += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def percentile(ordered, fraction):
+    """Return the given percentile of a sorted list, in milliseconds."""
+    if not ordered:
+        return 0.0
+    return ordered[max(int(len(ordered) * fraction) - 1, 0)] * 1000
+
+
+def main():
+    """Run the load test for every worker count."""
+    print(f"clients={CLIENTS} duration={DURATION}s path={PATH}")
+    print(f"{'workers':>7} {'req/s':>8} {'errors':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in WORKER_COUNTS:
+        env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(PORT))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "wsgi:application"],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(PORT)
+            latencies, errors = drive(f"http://127.0.0.1:{PORT}{PATH}")
+        finally:
+            server.terminate()
+            server.wait()
+        ordered = sorted(latencies)
+        print(
+            f"{workers:>7} {len(ordered) / DURATION:>8.1f} {errors:>6}"
+            f" {percentile(ordered, 0.5):>8.1f} {percentile(ordered, 0.99):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
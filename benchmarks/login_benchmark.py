@@ -0,0 +1,79 @@
+"""
+Micro-benchmark login password checks under concurrency.
+
+Drives PasswordHasher.verify, the CPU-heavy part of the /login route, from
+a number of concurrent request threads. Each configuration is run with
+hashing on the request thread (workers=0) and in the bounded process pool,
+reporting completed logins per second, refused (503) logins and p95 latency.
+
+Usage:
+    python benchmarks/login_benchmark.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from hashing import HashingBusy, PasswordHasher
+
+CONCURRENCY = (1, 4, 16, 64)
+WORKER_COUNTS = (0, 2, os.cpu_count() or 4)
+DURATION = float(os.environ.get("BENCH_DURATION", "5"))
+PASSWORD = "correct horse"
+
+
+def run(hasher, pwhash, concurrency):
+    """Hammer hasher.verify from ``concurrency`` threads for DURATION seconds."""
+    latencies = []
+    refused = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+
+    def client():
+        nonlocal refused
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                hasher.verify(pwhash, PASSWORD)
+            except HashingBusy:
+                with lock:
+                    refused += 1
+                # A real client backs off after a 503
+                time.sleep(0.01)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, refused
+
+
+def main():
+    """Print throughput and latency for every worker/concurrency pairing."""
+    method = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    print(f"method={method} duration={DURATION}s")
+    print(f"{'workers':>7} {'clients':>7} {'logins/s':>9} {'503s':>6} {'p95 ms':>8}")
+    for workers in WORKER_COUNTS:
+        hasher = PasswordHasher(method=method, max_workers=workers, max_pending=16)
+        pwhash = hasher.hash(PASSWORD)
+        for concurrency in CONCURRENCY:
+            latencies, refused = run(hasher, pwhash, concurrency)
+            ordered = sorted(latencies) or [0.0]
+            p95 = ordered[max(int(len(ordered) * 0.95) - 1, 0)] * 1000
+            print(
+                f"{workers:>7} {concurrency:>7} {len(latencies) / DURATION:>9.1f}"
+                f" {refused:>6} {p95:>8.1f}"
+            )
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
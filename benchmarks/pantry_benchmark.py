@@ -0,0 +1,120 @@
+"""
+Benchmark pantry matching against a client-side scan baseline.
+
+Seeds a throwaway database with synthetic recipes whose ingredients follow
+a skewed, Zipf-like popularity, builds the application's indexes, then
+times the aggregation used by the /pantry route against fetching every
+recipe and ranking them in Python.
+
+Usage:
+    BENCH_MONGO_URI=mongodb://localhost:27017 python benchmarks/pantry_benchmark.py
+
+Requires a running MongoDB server; the benchmark database is dropped at the
+start of each volume.
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from ingredients import STAPLES, match_pantry
+from migrations import ensure_indexes
+
+VOLUMES = (10_000, 100_000)
+QUERIES_PER_VOLUME = 200
+BATCH_SIZE = 5_000
+LIMIT = 20
+PANTRY_SIZE = 8
+VOCABULARY = [f"ingredient {n}" for n in range(2_000)]
+# Popularity falls off as 1/rank, so a few ingredients appear everywhere
+WEIGHTS = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+
+def seed(db, volume, rng):
+    """Insert ``volume`` synthetic recipes in batches."""
+    db.recipes.drop()
+    batch = []
+    for n in range(volume):
+        ingredients = set(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(4, 15)))
+        if rng.random() < 0.5:
+            ingredients.add(rng.choice(sorted(STAPLES)))
+        batch.append(
+            {
+                "recipe_name": f"Recipe {n}",
+                "ingredients": sorted(ingredients),
+                "created_by": f"user{n % 500}",
+            }
+        )
+        if len(batch) == BATCH_SIZE:
+            db.recipes.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.recipes.insert_many(batch, ordered=False)
+
+
+def scan_match(collection, pantry):
+    """Baseline: fetch every recipe and rank the coverage in Python."""
+    have = set(pantry) | STAPLES
+    ranked = []
+    for recipe in collection.find({}, {"ingredients": 1}):
+        ingredients = recipe.get("ingredients") or []
+        matched = sum(1 for name in ingredients if name in have)
+        if matched:
+            ranked.append((matched / len(ingredients), matched, recipe["_id"]))
+    ranked.sort(reverse=True)
+    return ranked[:LIMIT]
+
+
+def indexed_match(collection, pantry):
+    """Indexed aggregation, exactly as issued by the /pantry route."""
+    return match_pantry(collection, pantry, {"recipe_name": 1}, limit=LIMIT)
+
+
+def time_queries(run, collection, pantries):
+    """Return per-query latencies in milliseconds."""
+    latencies = []
+    for pantry in pantries:
+        start = time.perf_counter()
+        run(collection, pantry)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarise(latencies):
+    """Return p50/p95/max for a list of latencies."""
+    ordered = sorted(latencies)
+    return (
+        statistics.median(ordered),
+        ordered[int(len(ordered) * 0.95) - 1],
+        ordered[-1],
+    )
+
+
+def main():
+    """Run the benchmark at every volume and print a comparison table."""
+    uri = os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017")
+    db = MongoClient(uri)[os.environ.get("BENCH_MONGO_DBNAME", "flavorvault_bench")]
+    rng = random.Random(42)
+
+    print(f"{'recipes':>8} {'method':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for volume in VOLUMES:
+        seed(db, volume, rng)
+        ensure_indexes(db)
+        pantries = [
+            rng.choices(VOCABULARY, WEIGHTS, k=PANTRY_SIZE)
+            for _ in range(QUERIES_PER_VOLUME)
+        ]
+        for name, run in (("indexed", indexed_match), ("scan", scan_match)):
+            p50, p95, worst = summarise(time_queries(run, db.recipes, pantries))
+            print(f"{volume:>8} {name:>7} {p50:>8.2f} {p95:>8.2f} {worst:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Route-level benchmark suite for FlavorVault.
+
+Seeds a database with a parametrised volume of recipes, categories and
+users, drives the main routes through the Flask test client and reports
+p50/p95/p99 latency and requests per second for each. Results are written
+to a JSON file; pass a previous file with --compare to flag regressions.
+
+Usage:
+    BENCH_MONGO_URI=mongodb://localhost:27017 python benchmarks/route_benchmark.py
+    python benchmarks/route_benchmark.py --memory --volumes 1000 10000
+    python benchmarks/route_benchmark.py --compare before.json --output after.json
+
+--memory uses mongomock as an in-process stand-in for MongoDB; it measures
+application overhead only and must not be compared with server runs.
+mongomock cannot run the ``$lookup`` sub-pipeline that loads a profile, so
+the profile route is reported as not measured in this mode.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from werkzeug.security import generate_password_hash
+
+from migrations import ensure_indexes
+
+DEFAULT_VOLUMES = (1_000, 10_000, 100_000)
+# Routes mongomock cannot serve, with the reason shown instead of results
+MEMORY_UNSUPPORTED = {"profile": "not measured: mongomock has no $lookup pipeline"}
+CATEGORY_COUNT = 200
+USER_COUNT = 1_000
+BATCH_SIZE = 5_000
+PASSWORD = "benchmark"
+WORDS = (
+    "chicken beef tofu lentil pasta rice noodle curry soup salad stew roast "
+    "garlic lemon chilli ginger basil tomato mushroom spinach potato onion"
+).split()
+
+
+def parse_args():
+    """Read command line options."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--volumes", type=int, nargs="+", default=DEFAULT_VOLUMES)
+    parser.add_argument("--requests", type=int, default=200, help="Per route.")
+    parser.add_argument("--memory", action="store_true", help="Use mongomock.")
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--compare", help="Earlier results file to compare with.")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="Regression threshold in %%."
+    )
+    return parser.parse_args()
+
+
+def connect(memory):
+    """Return the Flask app and a fresh benchmark database."""
+    uri = os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017")
+    dbname = os.environ.get("BENCH_MONGO_DBNAME", "flavorvault_bench")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    # pylint: disable=import-outside-toplevel
+    from app import create_app
+    from database import mongo
+
+    app = create_app(
+        {
+            "MONGO_URI": f"{uri.rstrip('/')}/{dbname}",
+            "WTF_CSRF_ENABLED": False,
+            "ENSURE_INDEXES_ON_STARTUP": False,
+        }
+    )
+    if memory:
+        import mongomock
+
+        mongo.db = mongomock.MongoClient()[dbname]
+    return app, mongo.db
+
+
+def insert_batched(collection, documents):
+    """Insert an iterable of documents in unordered batches."""
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def seed(db, volume, requests, rng):
+    """
+    Replace the benchmark database contents with a synthetic dataset.
+
+    Returns:
+        dict: Names and ids the route drivers pick from
+    """
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+    ensure_indexes(db)
+
+    password = generate_password_hash(PASSWORD)
+    users = [f"user{n:05d}" for n in range(USER_COUNT)] + ["admin"]
+    insert_batched(
+        db.users,
+        (
+            {"username": name, "email": f"{name}@example.com", "password": password}
+            for name in users
+        ),
+    )
+
+    categories = [f"Category {n:03d}" for n in range(CATEGORY_COUNT)]
+    # Empty categories give delete_category something it is allowed to delete
+    empties = [f"Empty {n:05d}" for n in range(requests)]
+    counts = dict.fromkeys(categories, 0)
+    recipes = []
+    for _ in range(volume):
+        category = rng.choice(categories)
+        counts[category] += 1
+        recipes.append(
+            {
+                "recipe_name": " ".join(rng.sample(WORDS, 3)).title(),
+                "recipe_description": " ".join(rng.choices(WORDS, k=25)),
+                "category_name": category,
+                "date_added": datetime(2025, 1, 1) + timedelta(days=rng.randrange(365)),
+                "healthy": rng.choice(("on", "off")),
+                "created_by": rng.choice(users),
+                "revision": 1,
+            }
+        )
+    insert_batched(db.recipes, recipes)
+    insert_batched(
+        db.categories,
+        [{"category_name": name, "recipe_count": counts[name]} for name in categories]
+        + [{"category_name": name, "recipe_count": 0} for name in empties],
+    )
+
+    return {
+        "users": users,
+        "categories": categories,
+        "recipe_ids": [str(recipe["_id"]) for recipe in rng.sample(recipes, requests)],
+        "empty_ids": [
+            str(category["_id"])
+            for category in db.categories.find({"category_name": {"$in": empties}})
+        ],
+    }
+
+
+def logged_in(app, username):
+    """Return a test client whose session belongs to username."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user"] = username
+    return client
+
+
+def recipe_form(data, rng):
+    """Build a valid add/edit recipe form submission."""
+    return {
+        "recipe_name": " ".join(rng.sample(WORDS, 3)).title(),
+        "recipe_description": " ".join(rng.choices(WORDS, k=25)),
+        "category_name": rng.choice(data["categories"]),
+        "date_added": "01 January, 2025",
+        "healthy": "on",
+    }
+
+
+def route_drivers(app, data, rng):
+    """
+    Build one zero-argument request function per benchmarked route.
+
+    Returns:
+        dict: Route name to a callable issuing one request
+    """
+    admin = logged_in(app, "admin")
+    user = logged_in(app, rng.choice(data["users"][:-1]))
+    anonymous = app.test_client()
+    recipe_ids = iter(data["recipe_ids"])
+    empty_ids = iter(data["empty_ids"])
+
+    def login():
+        client = app.test_client()
+        return client.post(
+            "/login",
+            data={"username": rng.choice(data["users"][:-1]), "password": PASSWORD},
+        )
+
+    return {
+        "get_recipes": lambda: anonymous.get("/"),
+        "login": login,
+        "add_recipe": lambda: user.post("/add_recipe", data=recipe_form(data, rng)),
+        # Each seeded recipe is edited once, so it is still at revision 1
+        "edit_recipe": lambda: admin.post(
+            f"/edit_recipe/{next(recipe_ids)}",
+            data={**recipe_form(data, rng), "revision": 1},
+        ),
+        "delete_category": lambda: admin.get(f"/delete_category/{next(empty_ids)}"),
+        "profile": lambda: user.get(f"/profile/{rng.choice(data['users'][:-1])}"),
+    }
+
+
+def measure(request, count):
+    """Issue count requests and summarise their latency."""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        response = request()
+        response.get_data()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 500:
+            raise RuntimeError(f"Request failed with {response.status_code}")
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(fraction):
+        return round(latencies[max(int(len(latencies) * fraction) - 1, 0)], 3)
+
+    return {
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "rps": round(count / elapsed, 2),
+    }
+
+
+def git_commit():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print p95 changes against an earlier run, flagging regressions."""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = 0
+    for volume, routes in results.items():
+        for route, stats in routes.items():
+            before = baseline.get(volume, {}).get(route)
+            if not before:
+                continue
+            change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            flag = "REGRESSION" if change > threshold else ""
+            regressions += bool(flag)
+            print(f"{volume:>8} {route:<16} p95 {change:+7.1f}% {flag}")
+    return regressions
+
+
+def main():
+    """Seed, benchmark every route at every volume and save the results."""
+    args = parse_args()
+    app, db = connect(args.memory)
+    rng = random.Random(42)
+    results = {}
+
+    print(f"{'recipes':>8} {'route':<16} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}")
+    for volume in args.volumes:
+        data = seed(db, volume, args.requests, rng)
+        results[str(volume)] = {}
+        for route, request in route_drivers(app, data, rng).items():
+            if args.memory and route in MEMORY_UNSUPPORTED:
+                print(f"{volume:>8} {route:<16} {MEMORY_UNSUPPORTED[route]}")
+                continue
+            stats = measure(request, args.requests)
+            results[str(volume)][route] = stats
+            print(
+                f"{volume:>8} {route:<16} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}"
+                f" {stats['p99_ms']:>8.2f} {stats['rps']:>8.1f}"
+            )
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(
+            {
+                "commit": git_commit(),
+                "backend": "mongomock" if args.memory else "mongodb",
+                "requests": args.requests,
+                "results": results,
+            },
+            output,
+            indent=2,
+        )
+    print(f"Results written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
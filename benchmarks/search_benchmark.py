@@ -0,0 +1,114 @@
+"""
+Benchmark full-text recipe search against a regex-scan baseline.
+
+Seeds a throwaway database with synthetic recipes at each volume, builds
+the application's indexes, then times the text-index search used by the
+/search route against a case-insensitive regex over name and description.
+
+Usage:
+    BENCH_MONGO_URI=mongodb://localhost:27017 python benchmarks/search_benchmark.py
+
+Requires a running MongoDB server; the benchmark database is dropped at the
+start of each volume.
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# pylint: disable=wrong-import-position
+from migrations import ensure_indexes
+from search import search_recipes
+
+VOLUMES = (10_000, 100_000)
+QUERIES_PER_VOLUME = 200
+BATCH_SIZE = 5_000
+PAGE_SIZE = 20
+WORDS = (
+    "chicken beef tofu lentil pasta rice noodle curry soup salad stew roast "
+    "garlic lemon chilli ginger basil tomato mushroom spinach potato onion "
+    "pepper cheese butter honey quick easy spicy creamy crispy smoky fresh"
+).split()
+CATEGORIES = [f"Category {n}" for n in range(50)]
+
+
+def seed(db, volume, rng):
+    """Insert ``volume`` synthetic recipes in batches."""
+    db.recipes.drop()
+    batch = []
+    for n in range(volume):
+        batch.append(
+            {
+                "recipe_name": " ".join(rng.sample(WORDS, 3)),
+                "recipe_description": " ".join(rng.choices(WORDS, k=25)),
+                "category_name": rng.choice(CATEGORIES),
+                "healthy": rng.choice(("on", "off")),
+                "created_by": f"user{n % 500}",
+            }
+        )
+        if len(batch) == BATCH_SIZE:
+            db.recipes.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.recipes.insert_many(batch, ordered=False)
+
+
+def regex_search(collection, term):
+    """Baseline: unindexed case-insensitive regex over name and description."""
+    pattern = {"$regex": term, "$options": "i"}
+    return list(
+        collection.find(
+            {"$or": [{"recipe_name": pattern}, {"recipe_description": pattern}]}
+        ).limit(PAGE_SIZE + 1)
+    )
+
+
+def text_search(collection, term):
+    """Indexed text search, exactly as issued by the /search route."""
+    return list(search_recipes(collection, term, page_size=PAGE_SIZE))
+
+
+def time_queries(run, collection, terms):
+    """Return per-query latencies in milliseconds."""
+    latencies = []
+    for term in terms:
+        start = time.perf_counter()
+        run(collection, term)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarise(latencies):
+    """Return p50/p95/max for a list of latencies."""
+    ordered = sorted(latencies)
+    return (
+        statistics.median(ordered),
+        ordered[int(len(ordered) * 0.95) - 1],
+        ordered[-1],
+    )
+
+
+def main():
+    """Run the benchmark at every volume and print a comparison table."""
+    uri = os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017")
+    db = MongoClient(uri)[os.environ.get("BENCH_MONGO_DBNAME", "flavorvault_bench")]
+    rng = random.Random(42)
+
+    print(f"{'recipes':>8} {'method':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for volume in VOLUMES:
+        seed(db, volume, rng)
+        ensure_indexes(db)
+        terms = [rng.choice(WORDS) for _ in range(QUERIES_PER_VOLUME)]
+        for name, run in (("text", text_search), ("regex", regex_search)):
+            p50, p95, worst = summarise(time_queries(run, db.recipes, terms))
+            print(f"{volume:>8} {name:>6} {p50:>8.2f} {p95:>8.2f} {worst:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
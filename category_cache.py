@@ -0,0 +1,90 @@
+"""
+In-process cache for the FlavorVault category list.
+
+Categories are read on every recipe form render but only change when an
+administrator edits them, so the sorted list is kept in memory for a short
+time-to-live and dropped explicitly whenever a category is written.
+Callers that know the ``categories`` version stamp pass it in, so a list
+loaded before another worker's write is never served against the newer
+stamp.
+"""
+
+import threading
+import time
+
+
+class CategoryCache:
+    """
+    Time-limited, explicitly invalidated cache for the category list.
+
+    Attributes:
+        ttl (float): Seconds a loaded list stays valid
+        hits (int): Number of reads served from memory
+        misses (int): Number of reads that went to the database
+    """
+
+    def __init__(self, ttl=300, clock=time.monotonic):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._categories = None
+        self._version = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, loader, version=None):
+        """
+        Return the cached categories, loading them on a miss.
+
+        Args:
+            loader (callable): Zero-argument function returning the
+                               category documents from the database
+            version (int, optional): Current ``categories`` version stamp;
+                                     a list cached at another stamp is
+                                     reloaded. Defaults to None, which
+                                     accepts any unexpired list.
+
+        Returns:
+            tuple: Category documents in the order the loader returned them
+
+        Notes:
+            - The list is shared between requests, so it is returned as a
+              tuple to stop callers mutating it in place
+            - Loader errors propagate and leave the cache empty
+        """
+        with self._lock:
+            if (
+                self._categories is not None
+                and self._clock() < self._expires_at
+                and (version is None or version == self._version)
+            ):
+                self.hits += 1
+                return self._categories
+
+            self.misses += 1
+            self._categories = tuple(loader())
+            self._version = version
+            self._expires_at = self._clock() + self.ttl
+            return self._categories
+
+    def invalidate(self):
+        """Drop the cached list so the next read goes to the database."""
+        with self._lock:
+            self._categories = None
+            self._version = None
+            self._expires_at = 0.0
+
+    def stats(self):
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit and miss counters and whether a list is cached
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached": self._categories is not None,
+            }
@@ -0,0 +1,276 @@
+"""
+Response compression middleware for FlavorVault.
+
+Compresses text responses with brotli or gzip, whichever the client
+prefers in ``Accept-Encoding``. Streamed pages are compressed as they
+are produced: the first chunk is flushed at once, so the browser can start
+fetching the stylesheets in ``<head>``, and later output every
+``flush_size`` bytes of input, so the top of a long recipe list arrives
+before the end has been rendered. Template streaming yields many tiny
+chunks, and flushing each one separately would cost most of the
+compression ratio.
+"""
+
+from itertools import chain
+import zlib
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+)
+
+
+class GzipEncoder:
+    """Incremental gzip encoder."""
+
+    name = "gzip"
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        """Compress a chunk, returning whatever output is ready."""
+        return self._compressor.compress(chunk)
+
+    def flush(self):
+        """Return all pending output so it can be sent immediately."""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """Return the end of the stream."""
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    """Incremental brotli encoder."""
+
+    name = "br"
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        """Compress a chunk, returning whatever output is ready."""
+        return self._compressor.process(chunk)
+
+    def flush(self):
+        """Return all pending output so it can be sent immediately."""
+        return self._compressor.flush()
+
+    def finish(self):
+        """Return the end of the stream."""
+        return self._compressor.finish()
+
+
+def compress_chunks(encoder, chunks, flush_size=8192):
+    """
+    Compress an iterable of chunks, flushing at intervals.
+
+    Args:
+        encoder (GzipEncoder or BrotliEncoder): A fresh encoder
+        chunks (iterable): Body chunks as bytes
+        flush_size (int, optional): Input bytes between flushes
+
+    Yields:
+        bytes: Compressed data, ending with the end of the stream
+
+    Notes:
+        - The first non-empty chunk is flushed on its own, whatever its
+          size, so the start of a streamed page is never held back
+    """
+    # Chunks are joined before compressing: fast brotli settings emit a
+    # block per call, which defeats compression of tiny template chunks
+    pending, size = [], 0
+    # Flush as soon as the first chunk is in, then every flush_size bytes
+    limit = 1
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            yield encoder.compress(b"".join(pending)) + encoder.flush()
+            pending, size, limit = [], 0, flush_size
+    yield encoder.compress(b"".join(pending)) + encoder.finish()
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware negotiating and applying response compression.
+
+    Attributes:
+        app (callable): The wrapped WSGI application
+        min_size (int): Bodies smaller than this many bytes are sent as is
+        flush_size (int): Input bytes compressed between flushes
+        gzip_level (int): zlib compression level, 1-9
+        brotli_quality (int): brotli quality, 0-11
+    """
+
+    def __init__(
+        self, app, min_size=1024, flush_size=8192, gzip_level=6, brotli_quality=4
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.flush_size = flush_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self, environ):
+        """
+        Pick the encoding for a request.
+
+        Args:
+            environ (dict): The WSGI environment
+
+        Returns:
+            str: "br" or "gzip", or None if the client accepts neither
+        """
+        accepted = parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING"))
+        # The highest q value wins; brotli is listed first so it wins ties
+        best = max(self.encodings, key=lambda encoding: accepted[encoding])
+        return best if accepted[best] else None
+
+    def encoder(self, encoding):
+        """Create a fresh encoder for one response."""
+        if encoding == "br":
+            return BrotliEncoder(self.brotli_quality)
+        return GzipEncoder(self.gzip_level)
+
+    @staticmethod
+    def compressible(environ, status, headers):
+        """
+        Check whether a response may be compressed at all.
+
+        Args:
+            environ (dict): The WSGI environment
+            status (str): WSGI status line
+            headers (Headers): Response headers
+
+        Returns:
+            bool: True for text bodies that are not already encoded
+        """
+        code = int(status.split(None, 1)[0])
+        mimetype = headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        return (
+            code >= 200
+            and code not in (204, 206, 304)
+            and environ.get("REQUEST_METHOD") != "HEAD"
+            and "Content-Encoding" not in headers
+            and "no-transform" not in headers.get("Cache-Control", "")
+            and mimetype in COMPRESSIBLE_TYPES
+        )
+
+    def __call__(self, environ, start_response):
+        captured = []
+        # Data passed to the legacy write() callable, sent ahead of the body
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            # Headers are only sent once the body starts, so an error page
+            # may simply replace them
+            captured[:] = [(status, headers, exc_info)]
+            return written.append
+
+        return self._respond(
+            environ, start_response, self.app(environ, capture), captured, written
+        )
+
+    def _respond(self, environ, start_response, body, captured, written):
+        """
+        Yield the (possibly compressed) body, starting the response first.
+
+        Notes:
+            - Bodies of unknown length are buffered only until min_size
+              bytes have arrived, so small streamed bodies are still skipped
+            - Data the app passed to write() goes through the same path as
+              its body, in the order it was produced
+            - The wrapped body is always closed, which lets Flask finish
+              streamed requests
+        """
+        chunks = _with_writes(body, written)
+        try:
+            buffered = []
+            if not captured:
+                # The app may start the response while producing the first chunk
+                buffered.append(next(chunks, b""))
+            status, header_list, exc_info = captured[0]
+            headers = Headers(header_list)
+
+            if not self.compressible(environ, status, headers):
+                start_response(status, header_list, exc_info)
+                yield from buffered
+                yield from chunks
+                return
+
+            vary = list(_vary(headers))
+            if "accept-encoding" not in (name.lower() for name in vary):
+                headers["Vary"] = ", ".join(vary + ["Accept-Encoding"])
+            encoding = self.negotiate(environ)
+            length = headers.get("Content-Length", type=int)
+            if length is None and encoding is not None:
+                size = sum(len(chunk) for chunk in buffered)
+                for chunk in chunks:
+                    buffered.append(chunk)
+                    size += len(chunk)
+                    if size >= self.min_size:
+                        break
+                else:
+                    length = size
+                    headers["Content-Length"] = str(size)
+
+            if encoding is None or (length is not None and length < self.min_size):
+                start_response(status, headers.to_wsgi_list(), exc_info)
+                yield from buffered
+                yield from chunks
+                return
+
+            headers.remove("Content-Length")
+            headers["Content-Encoding"] = encoding
+            etag = headers.get("ETag")
+            if etag and not etag.startswith("W/"):
+                # The compressed bytes differ, so the tag can only be weak
+                headers["ETag"] = "W/" + etag
+            start_response(status, headers.to_wsgi_list(), exc_info)
+
+            # The buffered start of the body is flushed as the first chunk
+            yield from compress_chunks(
+                self.encoder(encoding),
+                chain([b"".join(buffered)], chunks),
+                self.flush_size,
+            )
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+
+def _with_writes(body, written):
+    """Yield the body's chunks, each preceded by the data written before it."""
+    for chunk in body:
+        while written:
+            yield written.pop(0)
+        yield chunk
+    while written:
+        yield written.pop(0)
+
+
+def _vary(headers):
+    """Yield each field name listed in the response's Vary headers."""
+    for value in headers.get_all("Vary"):
+        for name in value.split(","):
+            if name.strip():
+                yield name.strip()
@@ -0,0 +1,41 @@
+"""
+Shared database handle and cached reads for FlavorVault.
+
+Kept apart from app.py so blueprints can use the same MongoClient, read
+routing, category cache and view counter without importing the
+application module.
+"""
+
+from flask_pymongo import PyMongo
+
+from category_cache import CategoryCache
+from read_routing import ReadRouting
+from view_counts import ViewCounter
+
+# All four are configured by create_app(), once per worker process
+mongo = PyMongo()
+read_routing = ReadRouting(mongo)
+category_cache = CategoryCache()
+view_counter = ViewCounter(mongo)
+
+
+def get_all_categories(version=None):
+    """
+    Return all categories sorted by name, served from the category cache.
+
+    Args:
+        version (int, optional): ``categories`` version stamp the list must
+                                 match, e.g. the one a page's ETag is built
+                                 from. Defaults to None (any cached list).
+
+    Returns:
+        tuple: Category documents sorted by category_name
+
+    Notes:
+        - Always loaded from the primary: the cache is shared by every
+          user, so a stale load from a secondary would outlive the
+          invalidation that follows a category write
+    """
+    return category_cache.get(
+        lambda: mongo.db.categories.find().sort("category_name", 1), version
+    )
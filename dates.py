@@ -0,0 +1,202 @@
+"""
+Recipe dates for FlavorVault.
+
+``date_added`` is stored as a BSON date so recipes can be ordered and
+range-filtered through the ``date_added_id`` index. Dates arrive from the
+Materialize datepicker as "dd mmmm, yyyy" and from the filter form and
+imports as ISO "yyyy-mm-dd"; both are stored as midnight UTC.
+
+The date-ordered recipe list is addressed by the (date_added, _id) of the
+boundary recipe, like the search results, so every page is one bounded
+index scan.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+from pagination import KeysetPage
+
+# strftime equivalent of the datepicker's "dd mmmm, yyyy" format
+DATE_FORMAT = "%d %B, %Y"
+ISO_FORMAT = "%Y-%m-%d"
+
+
+def parse_date(value):
+    """
+    Convert a submitted or stored date into a datetime.
+
+    Args:
+        value (str or datetime): "05 March, 2025", an ISO 8601 date such as
+                                 "2025-03-05" (as exported), or a datetime,
+                                 which is returned unchanged
+
+    Returns:
+        datetime: Naive UTC, as PyMongo stores it; midnight for plain
+                  dates. None if the value is empty or not a date.
+    """
+    if isinstance(value, datetime):
+        return value
+    value = (value or "").strip()
+    try:
+        return datetime.strptime(value, DATE_FORMAT)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def format_date(value, date_format=DATE_FORMAT):
+    """
+    Render a stored date for display or for the datepicker.
+
+    Args:
+        value (datetime or str): A stored ``date_added``; recipes not yet
+                                 migrated may still hold the raw string
+        date_format (str, optional): strftime format. Defaults to DATE_FORMAT.
+
+    Returns:
+        str: The formatted date, or "" if there is none
+    """
+    if isinstance(value, datetime):
+        return value.strftime(date_format)
+    return value or ""
+
+
+def date_range(start=None, end=None):
+    """
+    Build a ``date_added`` condition covering whole days.
+
+    Args:
+        start (datetime, optional): First day included
+        end (datetime, optional): Last day included
+
+    Returns:
+        dict: Condition for the ``date_added`` field, or None for no bounds
+    """
+    condition = {}
+    if start is not None:
+        condition["$gte"] = start
+    if end is not None:
+        condition["$lt"] = end + timedelta(days=1)
+    return condition or None
+
+
+def date_cursor(document):
+    """
+    Build a date pagination cursor for a recipe.
+
+    Args:
+        document (dict): A recipe carrying its ``date_added``
+
+    Returns:
+        str: The date and ``_id`` joined as ``"<iso date>:<id>"``
+    """
+    return (
+        f"{document['date_added'].isoformat(timespec='milliseconds')}:{document['_id']}"
+    )
+
+
+def parse_date_cursor(value):
+    """
+    Convert a date cursor from the query string into (datetime, ObjectId).
+
+    Args:
+        value (str): Raw ``after``/``before`` query string value
+
+    Returns:
+        tuple: The parsed (date_added, _id) pair, or None if missing or
+               malformed
+    """
+    if not value:
+        return None
+    date_added, _, recipe_id = value.rpartition(":")
+    try:
+        return datetime.fromisoformat(date_added), ObjectId(recipe_id)
+    except (InvalidId, TypeError, ValueError):
+        return None
+
+
+def _beyond(cursor, operator):
+    """Match recipes past a (date_added, _id) cursor in one direction."""
+    date_added, recipe_id = cursor
+    return {
+        "$or": [
+            {"date_added": {operator: date_added}},
+            {"date_added": date_added, "_id": {operator: recipe_id}},
+        ]
+    }
+
+
+def paginate_by_date(
+    collection,
+    query=None,
+    projection=None,
+    page_size=20,
+    after=None,
+    before=None,
+    session=None,
+):
+    """
+    Fetch one page of recipes ordered by ``date_added``, newest first.
+
+    Args:
+        collection (Collection): The recipes collection
+        query (dict, optional): Additional filter to apply. Defaults to None.
+        projection (dict, optional): Fields to return; ``date_added`` is
+                                     always included for the cursor
+        page_size (int, optional): Recipes per page. Defaults to 20.
+        after (tuple, optional): (date_added, _id) of the last recipe shown
+        before (tuple, optional): (date_added, _id) of the first recipe shown
+        session (ClientSession, optional): Session to run the query in
+
+    Returns:
+        KeysetPage: The requested page
+
+    Notes:
+        - Recipes without a date are left out of this ordering
+        - Ties on the date are broken by ``_id`` so every recipe has a
+          stable position across pages
+    """
+    query = dict(query or {})
+    query.setdefault("date_added", {"$type": "date"})
+    if projection:
+        projection = {**projection, "date_added": 1}
+    sort = [("date_added", -1), ("_id", -1)]
+
+    if before is not None:
+        documents = list(
+            collection.find(
+                {"$and": [query, _beyond(before, "$gt")]}, projection, session=session
+            )
+            .sort([(field, -direction) for field, direction in sort])
+            .limit(page_size + 1)
+        )
+        has_prev = len(documents) > page_size
+        documents.reverse()
+        if has_prev:
+            documents = documents[1:]
+        return KeysetPage(
+            documents,
+            page_size,
+            has_prev=has_prev,
+            has_next=True,
+            cursor_for=date_cursor,
+        )
+
+    if after is not None:
+        query = {"$and": [query, _beyond(after, "$lt")]}
+    cursor = (
+        collection.find(query, projection, session=session)
+        .sort(sort)
+        .limit(page_size + 1)
+    )
+    return KeysetPage(
+        cursor, page_size, has_prev=after is not None, cursor_for=date_cursor
+    )
@@ -0,0 +1,192 @@
+"""
+Recipe list filters and facet counts for FlavorVault.
+
+The recipe list can be narrowed by category, to healthy recipes and to a
+range of dates added. The sidebar counts for every filter come from one
+``$facet`` aggregation, which is cached against the recipes version stamp
+so it only runs again after a recipe has been written.
+"""
+
+from collections import OrderedDict
+import threading
+
+from dates import date_range
+
+# Every writer stores "on" or "off", so listing both matches all recipes
+HEALTHY_VALUES = ["off", "on"]
+
+
+def recipe_filter(category_name=None, healthy=False, start=None, end=None):
+    """
+    Build the query for a filtered recipe list.
+
+    Args:
+        category_name (str, optional): Only return recipes in this category
+        healthy (bool, optional): Only return recipes marked healthy
+        start (datetime, optional): Only return recipes added on or after
+        end (datetime, optional): Only return recipes added on or before
+
+    Returns:
+        dict: Filter served by the category_healthy_id index
+
+    Notes:
+        - With a category but no healthy filter, ``healthy`` is matched
+          against both values so the planner merges two index ranges that
+          are already in ``_id`` order instead of sorting the category
+    """
+    query = {}
+    if category_name:
+        query["category_name"] = category_name
+        query["healthy"] = {"$in": HEALTHY_VALUES}
+    if healthy:
+        query["healthy"] = "on"
+    dates = date_range(start, end)
+    if dates:
+        query["date_added"] = dates
+    return query
+
+
+def facet_pipeline(category_name=None, healthy=False, start=None, end=None):
+    """
+    Build the aggregation counting recipes for every sidebar filter.
+
+    Args:
+        category_name (str, optional): The category currently selected
+        healthy (bool, optional): Whether the healthy filter is on
+        start (datetime, optional): First day of the selected date range
+        end (datetime, optional): Last day of the selected date range
+
+    Returns:
+        list: Pipeline to run against the recipes collection
+
+    Notes:
+        - Category counts respect the healthy filter and the healthy
+          count respects the selected category, so each count is the
+          number of recipes the link leads to
+        - A date range applies to every count
+    """
+    dates = date_range(start, end)
+    by_date = [{"$match": {"date_added": dates}}] if dates else []
+    by_category = [{"$match": {"healthy": "on"}}] if healthy else []
+    by_health = [{"$match": {"category_name": category_name}}] if category_name else []
+    return by_date + [
+        {
+            "$facet": {
+                "categories": by_category
+                + [
+                    {"$group": {"_id": "$category_name", "count": {"$sum": 1}}},
+                    {"$sort": {"_id": 1}},
+                ],
+                "health": by_health
+                + [{"$group": {"_id": "$healthy", "count": {"$sum": 1}}}],
+            }
+        }
+    ]
+
+
+def load_facets(
+    collection, category_name=None, healthy=False, start=None, end=None, session=None
+):
+    """
+    Run the facet pipeline and flatten its result.
+
+    Args:
+        collection (Collection): The recipes collection
+        category_name (str, optional): The category currently selected
+        healthy (bool, optional): Whether the healthy filter is on
+        start (datetime, optional): First day of the selected date range
+        end (datetime, optional): Last day of the selected date range
+        session (ClientSession, optional): Session to run the aggregation in
+
+    Returns:
+        dict: ``categories`` as (name, count) pairs, ``total`` across all
+              categories and the ``healthy`` count for the selected category
+    """
+    facets = next(
+        collection.aggregate(
+            facet_pipeline(category_name, healthy, start, end), session=session
+        )
+    )
+    health = {group["_id"]: group["count"] for group in facets["health"]}
+    return {
+        "categories": tuple(
+            (group["_id"], group["count"])
+            for group in facets["categories"]
+            if group["_id"]
+        ),
+        "total": sum(group["count"] for group in facets["categories"]),
+        "healthy": health.get("on", 0),
+    }
+
+
+class FacetCache:
+    """
+    Facet counts per filter, valid for one recipes version stamp.
+
+    Attributes:
+        max_entries (int): Filters kept before the least recently read is
+                           evicted
+        hits (int): Number of reads served from memory
+        misses (int): Number of reads that went to the database
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key, loader):
+        """
+        Return cached counts, loading them on a miss.
+
+        Args:
+            version (int): Current recipes version stamp
+            key (tuple): Identifies the filter, e.g. (category, healthy, start, end)
+            loader (callable): Zero-argument function returning the counts
+
+        Returns:
+            dict: The facet counts
+
+        Notes:
+            - A new version stamp drops every entry, so the cache never
+              serves counts from before another worker's write
+            - Filters come from the query string, so at most max_entries
+              of them are kept, least recently read evicted first
+        """
+        with self._lock:
+            if version == self._version and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        facets = loader()
+        with self._lock:
+            if version != self._version:
+                if self._version is not None and version < self._version:
+                    # Loaded against an older stamp than a concurrent request
+                    return facets
+                self._version = version
+                self._entries = OrderedDict()
+            self._entries[key] = facets
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return facets
+
+    def stats(self):
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit and miss counters and the number of filters cached
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,105 @@
+"""
+Rendered HTML fragment cache for FlavorVault.
+
+Holds the viewer-independent parts of each recipe's list entry, keyed by
+recipe id and checked against the recipe's revision so an entry rendered
+before an edit is never served after it, even by another worker process.
+Memory is bounded by the total length of the cached HTML, evicting the
+least recently used entries first.
+"""
+
+from collections import OrderedDict
+import threading
+
+
+class FragmentCache:
+    """
+    Least recently used cache of rendered fragments with a size bound.
+
+    Attributes:
+        max_size (int): Maximum total characters of cached HTML
+        size (int): Current total characters of cached HTML
+        hits (int): Number of fragments served from memory
+        misses (int): Number of fragments rendered
+    """
+
+    def __init__(self, max_size=8 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(parts):
+        """Approximate the memory held by a fragment as its total length."""
+        return sum(len(part) for part in parts)
+
+    def get(self, key, revision, render):
+        """
+        Return the fragment for key at revision, rendering it on a miss.
+
+        Args:
+            key (str): Identifier of the cached item, e.g. the recipe id
+            revision (hashable): Revision of the item the fragment must
+                                 match, e.g. an int or a tuple of them
+            render (callable): Zero-argument function returning a tuple of
+                               rendered HTML strings
+
+        Returns:
+            tuple: The rendered HTML strings
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == revision:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Render outside the lock; two threads may render the same fragment
+        parts = render()
+        size = self._sizeof(parts)
+        if size > self.max_size:
+            return parts
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (revision, parts)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= self._sizeof(evicted)
+        return parts
+
+    def _discard(self, key):
+        """Remove key if present. Caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= self._sizeof(entry[1])
+
+    def evict(self, key):
+        """
+        Drop the fragment for key, if cached.
+
+        Args:
+            key (str): Identifier of the item that changed or was deleted
+        """
+        with self._lock:
+            self._discard(key)
+
+    def stats(self):
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit and miss counters, entry count and size in characters
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "size": self.size,
+            }
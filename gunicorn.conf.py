@@ -0,0 +1,22 @@
+"""
+Gunicorn settings for FlavorVault, tunable through the environment.
+
+Usage:
+    gunicorn wsgi:application
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('IP', '0.0.0.0')}:{os.environ.get('PORT', '5000')}"
+# Each worker also starts PASSWORD_HASH_WORKERS hashing processes and the fork
+# server that starts them (see hashing.py), so a host runs
+# workers x (2 + PASSWORD_HASH_WORKERS) processes; size the two together
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+keepalive = 5
+
+# Each worker must import the app itself so it creates its own MongoClient
+preload_app = False
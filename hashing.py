@@ -0,0 +1,148 @@
+"""
+Password hashing off the request thread for FlavorVault.
+
+Werkzeug's default scrypt parameters are deliberately expensive, so hashes
+are computed in a small process pool. The number of hashes queued or in
+flight is bounded, and callers are refused straight away when the bound is
+reached instead of piling up behind a login burst.
+
+Pool processes are started by a fork server (or spawned where there is
+none) rather than forked from the web worker, which already runs PyMongo
+monitor threads and the app's background threads: forking a threaded
+process can copy a lock some other thread holds and deadlock the child.
+Every web worker has its own pool, so a host runs WEB_CONCURRENCY x
+PASSWORD_HASH_WORKERS hashing processes in total.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+
+# Never "fork": see the module docstring
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+def normalise_method(method):
+    """
+    Expand a Werkzeug hash method to the full prefix it writes into hashes.
+
+    Args:
+        method (str): Method such as "scrypt" or "pbkdf2:sha256"
+
+    Returns:
+        str: Method with its default parameters, e.g. "scrypt:32768:8:1"
+    """
+    parts = method.split(":")
+    if parts[0] == "scrypt" and len(parts) == 1:
+        return "scrypt:32768:8:1"
+    if parts[0] == "pbkdf2" and len(parts) < 3:
+        digest = parts[1] if len(parts) == 2 else "sha256"
+        return f"pbkdf2:{digest}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+    """
+    Bounded pool for generating and checking password hashes.
+
+    Attributes:
+        method (str): Werkzeug hash method used for new hashes
+        max_workers (int): Worker processes; 0 hashes on the calling thread
+        max_pending (int): Hashes allowed to wait for a free worker
+    """
+
+    def __init__(self, method="scrypt", max_workers=2, max_pending=16):
+        self.method = normalise_method(method)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        """Start the pool on first use so it is created after any fork."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        """Run func in the pool, refusing when the queue is full."""
+        if not self.max_workers:
+            return func(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        """
+        Hash a password with the configured method.
+
+        Args:
+            password (str): Plain text password
+
+        Returns:
+            str: Werkzeug password hash
+
+        Raises:
+            HashingBusy: If the hashing queue is full
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """
+        Check a password against a stored hash.
+
+        Args:
+            pwhash (str): Stored Werkzeug password hash
+            password (str): Plain text password to check
+
+        Returns:
+            bool: True if the password matches
+
+        Raises:
+            HashingBusy: If the hashing queue is full
+        """
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """
+        Report whether a stored hash uses different parameters.
+
+        Args:
+            pwhash (str): Stored Werkzeug password hash
+
+        Returns:
+            bool: True if the hash should be regenerated with self.method
+        """
+        return pwhash.split("$", 1)[0] != self.method
+
+    def shutdown(self):
+        """Stop the worker processes, if any were started."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
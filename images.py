@@ -0,0 +1,193 @@
+"""
+Recipe images for FlavorVault.
+
+Uploaded images are streamed into a GridFS bucket chunk by chunk, so a
+large upload is never held in memory. Thumbnails are generated afterwards
+by a small local thread pool, off the request path; Pillow releases the
+GIL while decoding and resizing, and JPEGs are decoded at reduced scale.
+Listing pages only ever reference the small thumbnail.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import io
+import threading
+
+from gridfs import GridFSBucket
+from gridfs.errors import NoFile
+from PIL import Image, UnidentifiedImageError
+
+BUCKET_NAME = "images"
+ALLOWED_TYPES = ("image/jpeg", "image/png", "image/webp", "image/gif")
+# Longest edge in pixels of each generated thumbnail
+THUMBNAIL_SIZES = {"small": 160, "medium": 480}
+THUMBNAIL_QUALITY = 82
+
+
+def image_bucket(db):
+    """
+    Open the GridFS bucket holding recipe images.
+
+    Args:
+        db (Database): The PyMongo database
+
+    Returns:
+        GridFSBucket: The ``images`` bucket
+    """
+    return GridFSBucket(db, bucket_name=BUCKET_NAME)
+
+
+def store_upload(db, upload, recipe_id):
+    """
+    Stream an uploaded image into GridFS.
+
+    Args:
+        db (Database): The PyMongo database
+        upload (FileStorage): The uploaded file from request.files
+        recipe_id (ObjectId): Recipe the image belongs to
+
+    Returns:
+        ObjectId: The stored file's id
+
+    Raises:
+        ValueError: If the upload is not one of ALLOWED_TYPES
+
+    Notes:
+        - The declared type is only a first check; the thumbnail worker
+          rejects files Pillow cannot decode
+    """
+    if upload.mimetype not in ALLOWED_TYPES:
+        raise ValueError(f"Unsupported image type: {upload.mimetype or 'unknown'}")
+    return image_bucket(db).upload_from_stream(
+        upload.filename or "image",
+        upload.stream,
+        metadata={
+            "recipe_id": recipe_id,
+            "content_type": upload.mimetype,
+            "kind": "original",
+        },
+    )
+
+
+def _thumbnail(original, longest_edge):
+    """Resize an open image to fit a square and encode it as JPEG."""
+    image = original.copy()
+    image.thumbnail((longest_edge, longest_edge))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    output.seek(0)
+    return output
+
+
+def generate_thumbnails(db, recipe_id, original_id):
+    """
+    Create every THUMBNAIL_SIZES thumbnail of an original image.
+
+    Args:
+        db (Database): The PyMongo database
+        recipe_id (ObjectId): Recipe the image belongs to
+        original_id (ObjectId): GridFS id of the uploaded original
+
+    Returns:
+        dict: Thumbnail GridFS id per size name
+
+    Raises:
+        ValueError: If the original is not a decodable image
+
+    Notes:
+        - The original is read from GridFS as a stream and, for JPEGs,
+          decoded at the smallest scale that still covers the largest
+          thumbnail, so huge photos are never fully decoded
+    """
+    bucket = image_bucket(db)
+    thumbnails = {}
+    with bucket.open_download_stream(original_id) as source:
+        try:
+            with Image.open(source) as original:
+                largest = max(THUMBNAIL_SIZES.values())
+                original.draft("RGB", (largest, largest))
+                original.load()
+                for name, longest_edge in THUMBNAIL_SIZES.items():
+                    thumbnails[name] = bucket.upload_from_stream(
+                        f"{original_id}-{name}.jpg",
+                        _thumbnail(original, longest_edge),
+                        metadata={
+                            "recipe_id": recipe_id,
+                            "content_type": "image/jpeg",
+                            "kind": name,
+                            "original": original_id,
+                        },
+                    )
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            delete_images(db, {"original": original_id, **thumbnails})
+            raise ValueError(f"Not a usable image: {e}") from e
+    return thumbnails
+
+
+def delete_images(db, image):
+    """
+    Delete an original image and its thumbnails from GridFS.
+
+    Args:
+        db (Database): The PyMongo database
+        image (dict): A recipe's ``image`` field, or any mapping whose
+                      values are GridFS ids or dicts of them
+    """
+    bucket = image_bucket(db)
+    for value in image.values():
+        for file_id in value.values() if isinstance(value, dict) else [value]:
+            try:
+                bucket.delete(file_id)
+            except NoFile:
+                pass
+
+
+class ThumbnailWorker:
+    """
+    Bounded background pool running thumbnail jobs.
+
+    Attributes:
+        max_workers (int): Threads generating thumbnails
+        max_pending (int): Jobs that may wait for a free thread
+    """
+
+    def __init__(self, max_workers=2, max_pending=64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """
+        Queue a job without blocking the caller.
+
+        Args:
+            fn (callable): The job
+            *args: Arguments for the job
+
+        Returns:
+            bool: False if the queue was full and the job was dropped
+
+        Notes:
+            - Dropped jobs leave the recipe without thumbnails; ``flask
+              images thumbnails`` generates any that are missing
+        """
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="thumbnails"
+                )
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return True
+
+    def shutdown(self):
+        """Wait for queued jobs to finish and stop the threads."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -0,0 +1,125 @@
+"""
+Structured recipe ingredients and pantry matching for FlavorVault.
+
+Recipes carry an ``ingredients`` array of normalised names, backed by the
+multikey ``ingredients`` index. "What can I cook?" ranks recipes by the
+share of their ingredients found in a pantry: the index selects only the
+recipes that share an ingredient with the pantry, and coverage, ranking
+and the cut to the best few all happen in one aggregation on the server.
+
+Staples such as salt and water are assumed to be in every pantry. They
+count towards coverage but never select candidates, as nearly every
+recipe would match them.
+"""
+
+import re
+
+MAX_INGREDIENTS = 50
+MAX_INGREDIENT_LENGTH = 60
+STAPLES = frozenset(("salt", "pepper", "black pepper", "water", "oil", "olive oil"))
+
+_SEPARATORS = re.compile(r"[\n,;]")
+
+
+def normalize_ingredient(name):
+    """
+    Normalise an ingredient name so equal ingredients compare equal.
+
+    Args:
+        name (str): Ingredient as typed, e.g. " Olive  Oil"
+
+    Returns:
+        str: Lowercase name with single spaces, e.g. "olive oil"
+    """
+    return " ".join(name.lower().split())[:MAX_INGREDIENT_LENGTH]
+
+
+def parse_ingredients(value, limit=MAX_INGREDIENTS):
+    """
+    Split submitted ingredients into a list of normalised names.
+
+    Args:
+        value (str or list): One ingredient per line or separated by
+                             commas or semicolons, or an already split list
+        limit (int, optional): Maximum number of ingredients kept.
+                               Defaults to MAX_INGREDIENTS.
+
+    Returns:
+        list: Distinct normalised names in the order first given
+    """
+    if isinstance(value, str):
+        value = _SEPARATORS.split(value)
+    names = (normalize_ingredient(str(name)) for name in value or ())
+    return list(dict.fromkeys(name for name in names if name))[:limit]
+
+
+def pantry_pipeline(pantry, projection=None, limit=20):
+    """
+    Build the aggregation ranking recipes by pantry coverage.
+
+    Args:
+        pantry (list): Normalised ingredient names the user has
+        projection (dict, optional): Recipe fields to return besides
+                                     ``coverage`` and ``missing``
+        limit (int, optional): Number of recipes returned. Defaults to 20.
+
+    Returns:
+        list: Pipeline to run against the recipes collection, or None if
+              the pantry holds nothing but staples
+
+    Notes:
+        - ``coverage`` is the share of a recipe's ingredients in the pantry,
+          ``matched`` their number and ``missing`` lists the rest; ties go
+          to the recipe using more of the pantry, then to the newest
+        - $sort followed by $limit keeps only ``limit`` recipes in memory
+          however many share an ingredient with the pantry
+    """
+    selectors = [name for name in pantry if name not in STAPLES]
+    if not selectors:
+        return None
+    have = sorted(set(pantry) | STAPLES)
+    return [
+        {"$match": {"ingredients": {"$in": selectors}}},
+        {
+            "$project": {
+                **(projection or {}),
+                "ingredients": 1,
+                "missing": {"$setDifference": ["$ingredients", have]},
+            }
+        },
+        {
+            "$addFields": {
+                "matched": {
+                    "$subtract": [{"$size": "$ingredients"}, {"$size": "$missing"}]
+                }
+            }
+        },
+        {
+            "$addFields": {
+                "coverage": {"$divide": ["$matched", {"$size": "$ingredients"}]}
+            }
+        },
+        {"$sort": {"coverage": -1, "matched": -1, "_id": -1}},
+        {"$limit": limit},
+    ]
+
+
+def match_pantry(collection, pantry, projection=None, limit=20, session=None):
+    """
+    Find the recipes best covered by a pantry.
+
+    Args:
+        collection (Collection): The recipes collection
+        pantry (list): Normalised ingredient names, e.g. from parse_ingredients
+        projection (dict, optional): Recipe fields to return
+        limit (int, optional): Number of recipes returned. Defaults to 20.
+        session (ClientSession, optional): Session to run the aggregation in
+
+    Returns:
+        list: Recipes carrying ``coverage`` (0-1), ``matched`` and
+              ``missing``, best covered first
+    """
+    pipeline = pantry_pipeline(pantry, projection, limit)
+    if pipeline is None:
+        return []
+    return list(collection.aggregate(pipeline, session=session))
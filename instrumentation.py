@@ -0,0 +1,249 @@
+"""
+Per-request instrumentation for FlavorVault.
+
+Counts the MongoDB commands each request issues and times them, times
+template rendering, reports both to the browser in a ``Server-Timing``
+header and aggregates them into histograms that can be scraped in
+Prometheus text format.
+
+Metrics are kept per worker process. Streamed pages send their headers
+before the body is rendered, so their ``Server-Timing`` covers only the
+work done up to that point; the histograms are recorded once the body has
+been sent and include everything.
+"""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+import threading
+import time
+
+from flask import before_render_template, g, request, template_rendered
+from pymongo import monitoring
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Upper bounds of the database commands per request buckets
+COMMAND_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Accumulated costs of a single request.
+
+    Attributes:
+        commands (int): MongoDB commands completed
+        db_time (float): Seconds spent in MongoDB commands
+        template_time (float): Seconds spent rendering templates
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._template_started = None
+
+
+class Histogram:
+    """
+    Cumulative histogram with a fixed set of buckets, one series per label.
+
+    Attributes:
+        name (str): Metric name
+        help_text (str): Description shown in the exposition format
+        buckets (tuple): Sorted upper bounds of the buckets
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        """
+        Record a value for the given label.
+
+        Args:
+            label (str): Value of the ``endpoint`` label
+            value (float): The observation
+        """
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                # Per bucket counts, then the sum and count of observations
+                series = self._series[label] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """
+        Format the histogram in Prometheus text exposition format.
+
+        Returns:
+            list: Lines of the exposition
+        """
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for label, (counts, total, observed) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(
+                        f'{self.name}_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f'{self.name}_bucket{{endpoint="{label}",le="+Inf"}} {observed}'
+                )
+                lines.append(f'{self.name}_sum{{endpoint="{label}"}} {total}')
+                lines.append(f'{self.name}_count{{endpoint="{label}"}} {observed}')
+        return lines
+
+
+class CommandCounter(monitoring.CommandListener):
+    """PyMongo listener adding each command to the current request's timings."""
+
+    def started(self, event):
+        """Commands are counted when they finish."""
+
+    def succeeded(self, event):
+        """Record a successful command."""
+        self._record(event)
+
+    def failed(self, event):
+        """Record a failed command; it still cost a round trip."""
+        self._record(event)
+
+    @staticmethod
+    def _record(event):
+        timings = _current.get()
+        if timings is not None:
+            timings.commands += 1
+            timings.db_time += event.duration_micros / 1_000_000
+
+
+class RequestMetrics:
+    """
+    Flask extension wiring the command listener, timing hooks and histograms.
+
+    Attributes:
+        listener (CommandCounter): Pass to MongoClient via event_listeners
+        histograms (tuple): Every histogram rendered by render()
+    """
+
+    def __init__(self):
+        self.listener = CommandCounter()
+        self.request_duration = Histogram(
+            "flavorvault_request_duration_seconds",
+            "Time spent handling a request.",
+            LATENCY_BUCKETS,
+        )
+        self.db_duration = Histogram(
+            "flavorvault_db_duration_seconds",
+            "Time spent in MongoDB commands per request.",
+            LATENCY_BUCKETS,
+        )
+        self.db_commands = Histogram(
+            "flavorvault_db_commands",
+            "MongoDB commands issued per request.",
+            COMMAND_BUCKETS,
+        )
+        self.template_duration = Histogram(
+            "flavorvault_template_duration_seconds",
+            "Time spent rendering templates per request.",
+            LATENCY_BUCKETS,
+        )
+        self.histograms = (
+            self.request_duration,
+            self.db_duration,
+            self.db_commands,
+            self.template_duration,
+        )
+
+    def init_app(self, app):
+        """
+        Register the request hooks and template signals on an app.
+
+        Args:
+            app (Flask): The application to instrument
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app, weak=False)
+        template_rendered.connect(self._after_render, app, weak=False)
+
+    @staticmethod
+    def _before_request():
+        g.request_timings = RequestTimings()
+        _current.set(g.request_timings)
+
+    @staticmethod
+    def _before_render(_sender, **_extra):
+        timings = _current.get()
+        if timings is not None:
+            timings._template_started = time.perf_counter()
+
+    @staticmethod
+    def _after_render(_sender, **_extra):
+        timings = _current.get()
+        if timings is not None and timings._template_started is not None:
+            timings.template_time += time.perf_counter() - timings._template_started
+            timings._template_started = None
+
+    @staticmethod
+    def _after_request(response):
+        timings = g.get("request_timings")
+        if timings is not None:
+            total = time.perf_counter() - timings.started
+            response.headers["Server-Timing"] = ", ".join(
+                (
+                    f'db;desc="{timings.commands} commands";dur={timings.db_time * 1000:.2f}',
+                    f"tpl;dur={timings.template_time * 1000:.2f}",
+                    f"total;dur={total * 1000:.2f}",
+                )
+            )
+        return response
+
+    def _teardown_request(self, _exc):
+        # Runs after a streamed body has finished, so totals are complete
+        timings = g.pop("request_timings", None)
+        if timings is None:
+            return
+        _current.set(None)
+        endpoint = request.endpoint or "unmatched"
+        self.request_duration.observe(endpoint, time.perf_counter() - timings.started)
+        self.db_duration.observe(endpoint, timings.db_time)
+        self.db_commands.observe(endpoint, timings.commands)
+        self.template_duration.observe(endpoint, timings.template_time)
+
+    def render(self, extra=()):
+        """
+        Render every histogram, plus any extra single-value metrics.
+
+        Args:
+            extra (iterable, optional): (name, type, help text, value) tuples,
+                                        e.g. cache counters
+
+        Returns:
+            str: Prometheus text exposition format
+        """
+        lines = []
+        for name, kind, help_text, value in extra:
+            lines += [
+                f"# HELP {name} {help_text}",
+                f"# TYPE {name} {kind}",
+                f"{name} {value}",
+            ]
+        for histogram in self.histograms:
+            lines += histogram.render()
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,236 @@
+"""
+Database bootstrap and maintenance helpers for FlavorVault.
+
+These functions take a PyMongo database handle so they can be run from the
+Flask CLI, at application startup, or from a plain Python shell.
+"""
+
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, UpdateOne
+
+from dates import parse_date
+
+# Indexes backing the queries issued by app.py, keyed by collection
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "categories": [
+        IndexModel(
+            [("category_name", ASCENDING)], name="category_name_unique", unique=True
+        ),
+    ],
+    "recipes": [
+        IndexModel([("created_by", ASCENDING)], name="created_by"),
+        # Serves category lookups and the filtered, newest-first recipe list
+        IndexModel(
+            [("category_name", ASCENDING), ("healthy", ASCENDING), ("_id", ASCENDING)],
+            name="category_healthy_id",
+        ),
+        # Serves the admin's most viewed recipes
+        IndexModel([("views", DESCENDING)], name="views"),
+        # Multikey index selecting the pantry matching candidates
+        IndexModel([("ingredients", ASCENDING)], name="ingredients"),
+        # Serves the date-ordered recipe list and date range filters
+        IndexModel(
+            [("date_added", DESCENDING), ("_id", DESCENDING)], name="date_added_id"
+        ),
+        IndexModel(
+            [("recipe_name", TEXT), ("recipe_description", TEXT)],
+            name="recipe_text",
+            weights={"recipe_name": 10, "recipe_description": 1},
+        ),
+    ],
+}
+
+# Representative filters for the hot queries, checked with explain()
+HOT_QUERIES = [
+    ("users", {"username": "admin"}),
+    ("categories", {"category_name": ""}),
+    ("recipes", {"category_name": ""}),
+    ("recipes", {"category_name": "", "healthy": "on"}),
+    ("recipes", {"created_by": "admin"}),
+    ("recipes", {"date_added": {"$gte": datetime(2025, 1, 1)}}),
+    ("recipes", {"ingredients": {"$in": ["egg", "flour"]}}),
+]
+
+
+def ensure_indexes(db):
+    """
+    Create every index in INDEXES that does not already exist.
+
+    Args:
+        db (Database): The PyMongo database to bootstrap
+
+    Returns:
+        dict: Index names per collection, as reported by the server
+
+    Notes:
+        - Safe to run repeatedly; MongoDB ignores identical index specs
+        - Unique indexes fail to build if duplicates already exist, in
+          which case OperationFailure is raised for that collection
+    """
+    return {
+        collection: db[collection].create_indexes(models)
+        for collection, models in INDEXES.items()
+    }
+
+
+def _plan_stages(plan):
+    """Yield every stage name found in an explain() plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def find_collection_scans(db, queries=None):
+    """
+    Explain each hot query and report the ones that scan a whole collection.
+
+    Args:
+        db (Database): The PyMongo database to inspect
+        queries (list, optional): (collection, filter) pairs to explain.
+                                  Defaults to HOT_QUERIES.
+
+    Returns:
+        list: The (collection, filter) pairs whose winning plan is a COLLSCAN
+    """
+    scans = []
+    for collection, query in queries or HOT_QUERIES:
+        explanation = db[collection].find(query).explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            scans.append((collection, query))
+    return scans
+
+
+def rebuild_recipe_counts(db):
+    """
+    Recompute each category's recipe_count with a single aggregation.
+
+    Args:
+        db (Database): The PyMongo database to repair
+
+    Returns:
+        int: Number of category documents whose count changed
+    """
+    counts = {
+        group["_id"]: group["count"]
+        for group in db.recipes.aggregate(
+            [{"$group": {"_id": "$category_name", "count": {"$sum": 1}}}]
+        )
+    }
+    updates = [
+        UpdateOne(
+            {"_id": category["_id"]},
+            {"$set": {"recipe_count": counts.get(category["category_name"], 0)}},
+        )
+        for category in db.categories.find({}, {"category_name": 1})
+    ]
+    if not updates:
+        return 0
+    return db.categories.bulk_write(updates, ordered=False).modified_count
+
+
+def backfill_recipe_counts(db):
+    """
+    Give categories created before recipe counting their recipe_count.
+
+    Args:
+        db (Database): The PyMongo database to bootstrap
+
+    Returns:
+        int: Number of categories whose count was filled in
+
+    Notes:
+        - Categories that already carry a count are left alone, so this is
+          safe to run on every deploy
+        - Counts are only maintained once present, so a recipe written
+          between the aggregation and the update is missed; run
+          rebuild_recipe_counts if that may have happened
+    """
+    missing = list(
+        db.categories.find({"recipe_count": {"$exists": False}}, {"category_name": 1})
+    )
+    if not missing:
+        return 0
+    names = [category["category_name"] for category in missing]
+    counts = {
+        group["_id"]: group["count"]
+        for group in db.recipes.aggregate(
+            [
+                {"$match": {"category_name": {"$in": names}}},
+                {"$group": {"_id": "$category_name", "count": {"$sum": 1}}},
+            ]
+        )
+    }
+    updates = [
+        UpdateOne(
+            {"_id": category["_id"], "recipe_count": {"$exists": False}},
+            {"$set": {"recipe_count": counts.get(category["category_name"], 0)}},
+        )
+        for category in missing
+    ]
+    return db.categories.bulk_write(updates, ordered=False).modified_count
+
+
+def migrate_recipe_dates(db, batch_size=1000):
+    """
+    Convert recipes' string ``date_added`` values into BSON dates.
+
+    Args:
+        db (Database): The PyMongo database to migrate
+        batch_size (int, optional): Recipes per read and bulk write.
+                                    Defaults to 1000.
+
+    Returns:
+        tuple: (converted, unparseable) recipe counts
+
+    Notes:
+        - Resumable: only recipes whose date is still a string are read,
+          so a run that was interrupted continues where it stopped
+        - Each batch is one bounded read in ``_id`` order and one unordered
+          bulk write, so memory use does not grow with the collection
+        - Each update is conditional on the string it replaces, so a
+          recipe edited during the migration is left as the edit wrote it
+        - Strings that are not dates are kept in ``date_added_text`` and
+          the date is cleared, so nothing is lost and reruns skip them
+    """
+    converted = unparseable = 0
+    last_id = None
+    while True:
+        query = {"date_added": {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(
+            db.recipes.find(query, {"date_added": 1}).sort("_id", 1).limit(batch_size)
+        )
+        if not batch:
+            return converted, unparseable
+
+        updates = []
+        for recipe in batch:
+            text = recipe["date_added"].strip()
+            date_added = parse_date(text)
+            if date_added is not None:
+                update = {"date_added": date_added}
+                converted += 1
+            elif text:
+                update = {"date_added": None, "date_added_text": text}
+                unparseable += 1
+            else:
+                update = {"date_added": None}
+            updates.append(
+                UpdateOne(
+                    {"_id": recipe["_id"], "date_added": recipe["date_added"]},
+                    {"$set": update},
+                )
+            )
+        db.recipes.bulk_write(updates, ordered=False)
+        last_id = batch[-1]["_id"]
@@ -0,0 +1,154 @@
+"""
+Keyset (cursor-based) pagination helpers for FlavorVault.
+
+Pages are ordered newest first by ``_id`` and addressed by the ``_id`` of
+the boundary document rather than by an offset, so fetching page N costs
+the same as fetching page 1 and never uses ``skip()``.
+"""
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+
+def id_cursor(document):
+    """
+    Build the default pagination cursor for a document.
+
+    Args:
+        document (dict): A document returned by the page query
+
+    Returns:
+        str: The document's ``_id`` as a string
+    """
+    return str(document["_id"])
+
+
+def parse_cursor(value):
+    """
+    Convert a pagination cursor from the query string into an ObjectId.
+
+    Args:
+        value (str): Raw ``after``/``before`` query string value
+
+    Returns:
+        ObjectId: The parsed cursor, or None if missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+class KeysetPage:
+    """
+    A single page of documents read lazily from a MongoDB cursor.
+
+    The page is iterable exactly once. Documents are yielded as the cursor
+    produces them, so the template can render rows without the page being
+    materialised into a list first. ``next_cursor`` and ``prev_cursor``
+    are only known once iteration has finished.
+
+    Attributes:
+        page_size (int): Maximum number of documents on the page
+        has_prev (bool): Whether newer documents exist before this page
+        has_next (bool): Whether older documents exist after this page
+        cursor_for (callable): Builds a cursor string from a boundary
+                               document, defaults to its ``_id``
+    """
+
+    def __init__(
+        self, documents, page_size, has_prev=False, has_next=None, cursor_for=id_cursor
+    ):
+        self._documents = documents
+        self.page_size = page_size
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.cursor_for = cursor_for
+        self.first = None
+        self.last = None
+
+    def __iter__(self):
+        count = 0
+        for document in self._documents:
+            if count == self.page_size:
+                # The extra document only tells us another page exists
+                self.has_next = True
+                break
+            if self.first is None:
+                self.first = document
+            self.last = document
+            count += 1
+            yield document
+        if self.has_next is None:
+            self.has_next = False
+
+    @property
+    def next_cursor(self):
+        """str: Cursor for the next (older) page, or None on the last page."""
+        if self.has_next and self.last is not None:
+            return self.cursor_for(self.last)
+        return None
+
+    @property
+    def prev_cursor(self):
+        """str: Cursor for the previous (newer) page, or None on the first page."""
+        if self.has_prev and self.first is not None:
+            return self.cursor_for(self.first)
+        return None
+
+
+def paginate(
+    collection,
+    query=None,
+    projection=None,
+    page_size=20,
+    after=None,
+    before=None,
+    session=None,
+):
+    """
+    Fetch one page of a collection ordered newest first by ``_id``.
+
+    Args:
+        collection (Collection): The PyMongo collection to read from
+        query (dict, optional): Additional filter to apply. Defaults to None.
+        projection (dict, optional): Fields to return. Defaults to None.
+        page_size (int, optional): Documents per page. Defaults to 20.
+        after (ObjectId, optional): Return documents older than this id
+        before (ObjectId, optional): Return documents newer than this id
+        session (ClientSession, optional): Session to run the query in
+
+    Returns:
+        KeysetPage: The requested page
+
+    Notes:
+        - One extra document is requested to detect whether a further page
+          exists, so each page costs a single bounded query
+        - Paging backwards reads in ascending order and reverses the
+          (bounded) result so the page is still shown newest first
+    """
+    query = dict(query or {})
+
+    if before is not None:
+        query["_id"] = {"$gt": before}
+        documents = list(
+            collection.find(query, projection, session=session)
+            .sort("_id", 1)
+            .limit(page_size + 1)
+        )
+        has_prev = len(documents) > page_size
+        documents.reverse()
+        if has_prev:
+            documents = documents[1:]
+        return KeysetPage(documents, page_size, has_prev=has_prev, has_next=True)
+
+    if after is not None:
+        query["_id"] = {"$lt": after}
+    cursor = (
+        collection.find(query, projection, session=session)
+        .sort("_id", -1)
+        .limit(page_size + 1)
+    )
+    return KeysetPage(cursor, page_size, has_prev=after is not None)
@@ -0,0 +1,247 @@
+"""
+Profile dashboard queries and cache for FlavorVault.
+
+A profile page shows one page of the user's recipes, their recipe count
+per category, the share marked healthy and their latest additions. All of
+it comes from a single aggregation: the user document is matched by its
+unique username and joined to their recipes through the ``created_by``
+index, where a ``$facet`` stage computes every panel in one pass.
+Results are kept in memory per user, valid for one ``recipes`` version
+stamp, so a write made through any worker invalidates them everywhere.
+"""
+
+from collections import OrderedDict
+import threading
+import time
+
+RECENT_LIMIT = 5
+
+
+def profile_pipeline(username, projection, page_size=20, after=None):
+    """
+    Build the aggregation producing a user's whole profile dashboard.
+
+    Args:
+        username (str): Username whose profile is shown
+        projection (dict): Recipe fields to return for the page of recipes
+        page_size (int, optional): Recipes per page. Defaults to 20.
+        after (ObjectId, optional): Return recipes older than this id
+
+    Returns:
+        list: Pipeline to run against the users collection
+
+    Notes:
+        - The ``$lookup`` combines localField/foreignField with a
+          sub-pipeline, which needs MongoDB 5.0 or later
+        - One extra recipe is read to detect whether a further page exists
+    """
+    page = [{"$match": {"_id": {"$lt": after}}}] if after is not None else []
+    page += [
+        {"$sort": {"_id": -1}},
+        {"$limit": page_size + 1},
+        {"$project": projection},
+    ]
+
+    return [
+        {"$match": {"username": username}},
+        {"$project": {"username": 1}},
+        {
+            "$lookup": {
+                "from": "recipes",
+                "localField": "username",
+                "foreignField": "created_by",
+                "pipeline": [
+                    {
+                        "$facet": {
+                            "recipes": page,
+                            "categories": [
+                                {
+                                    "$group": {
+                                        "_id": "$category_name",
+                                        "count": {"$sum": 1},
+                                    }
+                                },
+                                {"$sort": {"count": -1, "_id": 1}},
+                            ],
+                            "health": [
+                                {
+                                    "$group": {
+                                        "_id": None,
+                                        "total": {"$sum": 1},
+                                        "healthy": {
+                                            "$sum": {
+                                                "$cond": [
+                                                    {"$eq": ["$healthy", "on"]},
+                                                    1,
+                                                    0,
+                                                ]
+                                            }
+                                        },
+                                    }
+                                }
+                            ],
+                            "recent": [
+                                {"$sort": {"_id": -1}},
+                                {"$limit": RECENT_LIMIT},
+                                {"$project": {"recipe_name": 1, "date_added": 1}},
+                            ],
+                        }
+                    }
+                ],
+                "as": "dashboard",
+            }
+        },
+    ]
+
+
+def load_profile(db, username, projection, page_size=20, after=None, session=None):
+    """
+    Run the profile pipeline and flatten its result.
+
+    Args:
+        db (Database): The PyMongo database
+        username (str): Username whose profile is shown
+        projection (dict): Recipe fields to return for the page of recipes
+        page_size (int, optional): Recipes per page. Defaults to 20.
+        after (ObjectId, optional): Return recipes older than this id
+        session (ClientSession, optional): Session to run the aggregation in
+
+    Returns:
+        dict: ``recipes`` (page_size + 1 at most), ``categories`` as
+              (name, count) pairs, ``total``, ``healthy`` and ``recent``,
+              or None if the user does not exist
+    """
+    users = list(
+        db.users.aggregate(
+            profile_pipeline(username, projection, page_size, after),
+            session=session,
+        )
+    )
+    if not users:
+        return None
+
+    # $facet always emits exactly one document, even for no recipes
+    dashboard = users[0]["dashboard"][0]
+    health = dashboard["health"][0] if dashboard["health"] else {}
+    return {
+        "recipes": tuple(dashboard["recipes"]),
+        "categories": tuple(
+            (category["_id"], category["count"]) for category in dashboard["categories"]
+        ),
+        "total": health.get("total", 0),
+        "healthy": health.get("healthy", 0),
+        "recent": tuple(dashboard["recent"]),
+    }
+
+
+class ProfileCache:
+    """
+    Per-user cache of profile dashboards, valid for one recipes version stamp.
+
+    Attributes:
+        ttl (float): Seconds a loaded dashboard stays valid
+        max_users (int): Users kept before the least recently read is evicted
+        max_pages (int): Pages kept per user before the least recently
+                         read is evicted
+        hits (int): Number of reads served from memory
+        misses (int): Number of reads that went to the database
+    """
+
+    def __init__(self, ttl=300, max_users=1000, max_pages=8, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        # username -> (expires_at, version, {page key: dashboard})
+        self._users = OrderedDict()
+        # Bumped by invalidate() so loads racing a write are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, username, page, version, loader, store=True):
+        """
+        Return a cached dashboard page, loading it on a miss.
+
+        Args:
+            username (str): Owner of the profile
+            page (str): Identifies the page, e.g. its ``after`` cursor
+            version (int): ``recipes`` version stamp, read before the
+                           dashboard in the same session
+            loader (callable): Zero-argument function returning the
+                               dashboard, or None if the user is unknown
+            store (bool, optional): Whether a loaded dashboard may be
+                                    cached. Defaults to True.
+
+        Returns:
+            dict: The dashboard, or None if the loader returned None
+
+        Notes:
+            - The loader runs outside the lock so a slow query does not
+              block readers of other profiles
+            - Unknown users are not cached
+            - Page keys come from the query string, so at most max_pages
+              of them are kept per user
+            - An entry cached at another version stamp is a miss, so
+              writes made by other worker processes are seen at once; a
+              dashboard loaded at an older stamp than the cached entry,
+              e.g. from a lagging secondary, is not stored
+        """
+        with self._lock:
+            entry = self._users.get(username)
+            if entry is not None and self._clock() < entry[0] and entry[1] == version:
+                dashboard = entry[2].get(page)
+                if dashboard is not None:
+                    entry[2].move_to_end(page)
+                    self._users.move_to_end(username)
+                    self.hits += 1
+                    return dashboard
+            self.misses += 1
+            generation = self._generation
+
+        dashboard = loader()
+        if dashboard is None or not store:
+            return dashboard
+
+        with self._lock:
+            if generation != self._generation:
+                return dashboard
+            entry = self._users.get(username)
+            if entry is not None and version < entry[1]:
+                return dashboard
+            if entry is None or self._clock() >= entry[0] or version != entry[1]:
+                entry = self._users[username] = (
+                    self._clock() + self.ttl,
+                    version,
+                    OrderedDict(),
+                )
+            entry[2][page] = dashboard
+            entry[2].move_to_end(page)
+            while len(entry[2]) > self.max_pages:
+                entry[2].popitem(last=False)
+            self._users.move_to_end(username)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return dashboard
+
+    def invalidate(self, username):
+        """
+        Drop every cached page of a user's profile.
+
+        Args:
+            username (str): The user whose recipes changed
+        """
+        with self._lock:
+            self._generation += 1
+            self._users.pop(username, None)
+
+    def stats(self):
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit and miss counters and the number of users cached
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "users": len(self._users)}
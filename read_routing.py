@@ -0,0 +1,214 @@
+"""
+Read preference routing for FlavorVault.
+
+Endpoints listed in ``READ_ROUTES`` only read, so their queries may be
+served by replica set secondaries: they run against a database handle
+with the configured read preference, typically ``secondaryPreferred``
+with a ``maxStalenessSeconds`` bound. Every other endpoint, and every
+write, stays on the primary.
+
+Secondaries lag behind the primary, so a user redirected to the recipe
+list after adding a recipe could be shown a list without it. To prevent
+that, the operation and cluster time the server reports for each write
+are kept in the writer's session cookie, and read-only requests run their
+queries in a causally consistent session advanced to that time: the
+secondary waits until it has applied the user's own writes before
+answering. Other users' reads are never held back.
+"""
+
+from contextvars import ContextVar
+
+from bson import json_util
+from flask import g, request, session
+from pymongo import monitoring
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+# Commands whose operation time a later read must observe
+WRITE_COMMANDS = frozenset(("insert", "update", "delete", "findAndModify"))
+# Session cookie key holding the latest write's operation and cluster time
+TOKEN_KEY = "causal_token"
+
+_current = ContextVar("causal_writes", default=None)
+
+
+def make_read_preference(mode, max_staleness=-1):
+    """
+    Build a read preference from its name.
+
+    Args:
+        mode (str): One of READ_PREFERENCES, e.g. "secondaryPreferred"
+        max_staleness (int, optional): Seconds a secondary may lag behind
+                                       the primary and still be read from,
+                                       at least 90, or -1 for no bound
+
+    Returns:
+        ServerMode: The read preference
+
+    Raises:
+        ValueError: If the mode is not a known read preference
+    """
+    try:
+        preference = READ_PREFERENCES[mode]
+    except KeyError:
+        raise ValueError(f"Unknown read preference: {mode}") from None
+    if preference is Primary:
+        return Primary()
+    return preference(max_staleness=max_staleness)
+
+
+class OperationTimeListener(monitoring.CommandListener):
+    """PyMongo listener keeping the cluster time of the current request's writes."""
+
+    def started(self, event):
+        """Writes are recorded once acknowledged."""
+
+    def succeeded(self, event):
+        """Remember the newest operation time a write reported."""
+        writes = _current.get()
+        if writes is None or event.command_name not in WRITE_COMMANDS:
+            return
+        operation_time = event.reply.get("operationTime")
+        cluster_time = event.reply.get("$clusterTime")
+        # Standalone servers report neither
+        if operation_time is None or cluster_time is None:
+            return
+        if not writes or operation_time > writes["operationTime"]:
+            writes["operationTime"] = operation_time
+            writes["$clusterTime"] = cluster_time
+
+    def failed(self, event):
+        """Failed writes leave nothing to wait for."""
+
+
+class ReadRouting:
+    """
+    Flask extension routing read-only endpoints to secondaries.
+
+    Attributes:
+        mongo (PyMongo): The shared Flask-PyMongo extension
+        listener (OperationTimeListener): Pass to MongoClient via event_listeners
+        read_preference (ServerMode): Used by the endpoints in read_routes
+        read_routes (frozenset): Endpoints allowed to read from secondaries
+    """
+
+    def __init__(self, mongo):
+        self.mongo = mongo
+        self.listener = OperationTimeListener()
+        self.read_preference = Primary()
+        self.read_routes = frozenset()
+
+    def init_app(self, app):
+        """
+        Read the routing config and register the request hooks.
+
+        Args:
+            app (Flask): The application; reads MONGO_READ_PREFERENCE,
+                         MONGO_MAX_STALENESS_SECONDS and READ_ROUTES
+
+        Raises:
+            ValueError: If MONGO_READ_PREFERENCE is not a known mode
+        """
+        self.read_preference = make_read_preference(
+            app.config["MONGO_READ_PREFERENCE"],
+            app.config["MONGO_MAX_STALENESS_SECONDS"],
+        )
+        self.read_routes = frozenset(app.config["READ_ROUTES"])
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @property
+    def enabled(self):
+        """bool: Whether any reads are routed away from the primary."""
+        return not isinstance(self.read_preference, Primary)
+
+    def routed(self):
+        """
+        Check whether the current request may read from secondaries.
+
+        Returns:
+            bool: True for endpoints in read_routes when routing is enabled
+        """
+        return self.enabled and request.endpoint in self.read_routes
+
+    def reads_own_writes(self):
+        """
+        Check whether the current request's reads see the user's writes.
+
+        Returns:
+            bool: True when reading from the primary, or from a secondary
+                  in a session advanced past the user's latest write
+        """
+        return not self.routed() or TOKEN_KEY in session
+
+    def database(self):
+        """
+        Return the database handle the current request should read from.
+
+        Returns:
+            Database: mongo.db, with the configured read preference for
+                      read-only endpoints
+        """
+        if not self.routed():
+            return self.mongo.db
+        return self.mongo.db.with_options(read_preference=self.read_preference)
+
+    def session(self):
+        """
+        Return the causally consistent session for the current request's reads.
+
+        Returns:
+            ClientSession: A session advanced past the user's latest write,
+                           or None when the request reads from the primary
+
+        Notes:
+            - Pass it as ``session=`` to every query made through
+              database(); it is ended when the request tears down, after
+              any streamed body has been sent
+        """
+        if not self.routed():
+            return None
+        if "read_session" not in g:
+            read_session = self.mongo.cx.start_session(causal_consistency=True)
+            token = session.get(TOKEN_KEY)
+            if token:
+                token = json_util.loads(token)
+                read_session.advance_cluster_time(token["$clusterTime"])
+                read_session.advance_operation_time(token["operationTime"])
+            g.read_session = read_session
+        return g.read_session
+
+    def _before_request(self):
+        if self.enabled:
+            g.causal_writes = {}
+            _current.set(g.causal_writes)
+
+    @staticmethod
+    def _after_request(response):
+        writes = g.get("causal_writes")
+        if writes:
+            session[TOKEN_KEY] = json_util.dumps(
+                writes, json_options=json_util.CANONICAL_JSON_OPTIONS
+            )
+        return response
+
+    @staticmethod
+    def _teardown_request(_exc):
+        if g.pop("causal_writes", None) is not None:
+            _current.set(None)
+        read_session = g.pop("read_session", None)
+        if read_session is not None:
+            read_session.end_session()
@@ -0,0 +1,218 @@
+"""
+Bulk recipe import and export for FlavorVault.
+
+Records are streamed from and to JSON Lines or CSV files, so files of any
+size are processed in constant memory. Imports are written in unordered
+batches and exports read a projected cursor with a bounded batch size.
+"""
+
+import csv
+import json
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from dates import parse_date
+from ingredients import parse_ingredients
+from versioning import bump_versions
+
+FORMATS = ("jsonl", "csv")
+EXPORT_FIELDS = (
+    "recipe_name",
+    "category_name",
+    "recipe_description",
+    "ingredients",
+    "date_added",
+    "healthy",
+    "created_by",
+)
+REQUIRED_FIELDS = ("recipe_name", "recipe_description", "category_name")
+
+
+def detect_format(filename, default="jsonl"):
+    """
+    Guess the file format from a filename's extension.
+
+    Args:
+        filename (str): File name or "-" for stdin/stdout
+        default (str, optional): Format to use when unknown. Defaults to "jsonl".
+
+    Returns:
+        str: "csv" or "jsonl"
+    """
+    return "csv" if filename.lower().endswith(".csv") else default
+
+
+def read_records(stream, fmt):
+    """
+    Yield raw recipe records from a JSON Lines or CSV stream.
+
+    Args:
+        stream (file): Text stream to read
+        fmt (str): "jsonl" or "csv"
+
+    Yields:
+        dict: One record per line or row; blank JSON lines are skipped and
+              lines that are not a JSON object yield None
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+def to_recipe(record, valid_categories, created_by):
+    """
+    Validate a raw record and convert it into a recipe document.
+
+    Args:
+        record (dict): Raw record from read_records, None if malformed
+        valid_categories (set): Names of the existing categories
+        created_by (str): Owner used when the record does not name one
+
+    Returns:
+        dict: The recipe document, or None if the record is invalid
+    """
+    if record is None:
+        return None
+    recipe = {field: str(record.get(field) or "").strip() for field in EXPORT_FIELDS}
+    if not all(recipe[field] for field in REQUIRED_FIELDS):
+        return None
+    if recipe["category_name"] not in valid_categories:
+        return None
+
+    healthy = record.get("healthy")
+    recipe["healthy"] = "on" if healthy in (True, "on", "true", "True", "1") else "off"
+    recipe["created_by"] = recipe["created_by"] or created_by
+    # Dates that cannot be parsed are kept as text, as the migration does
+    date_added = parse_date(recipe["date_added"])
+    if date_added is None and recipe["date_added"]:
+        recipe["date_added_text"] = recipe["date_added"]
+    recipe["date_added"] = date_added
+    # A list in JSON Lines, one ingredient per line in a CSV cell
+    recipe["ingredients"] = parse_ingredients(record.get("ingredients"))
+    recipe["revision"] = 1
+    return recipe
+
+
+def _insert_batch(db, batch):
+    """Insert a batch unordered and return the positions that failed."""
+    try:
+        db.recipes.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        return {error["index"] for error in e.details["writeErrors"]}
+    return set()
+
+
+def import_recipes(db, records, batch_size=1000, created_by="admin"):
+    """
+    Insert recipes from an iterable of raw records in batches.
+
+    Args:
+        db (Database): The PyMongo database
+        records (iterable): Raw records, e.g. from read_records
+        batch_size (int, optional): Documents per insert_many. Defaults to 1000.
+        created_by (str, optional): Owner for records that do not name one
+
+    Returns:
+        tuple: (inserted, skipped) record counts
+
+    Notes:
+        - Categories are loaded once up front; records naming an unknown
+          category are skipped rather than creating it, as are malformed
+          records
+        - Each batch increments the recipe_count of its categories once
+          per category and bumps the version stamps as soon as it is
+          inserted, so an import that fails part way leaves the counts
+          matching the recipes already written
+    """
+    valid_categories = set(db.categories.distinct("category_name"))
+    inserted = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal inserted, skipped
+        failed = _insert_batch(db, batch)
+        per_category = {}
+        for position, recipe in enumerate(batch):
+            if position in failed:
+                skipped += 1
+                continue
+            inserted += 1
+            name = recipe["category_name"]
+            per_category[name] = per_category.get(name, 0) + 1
+        batch.clear()
+        if per_category:
+            db.categories.bulk_write(
+                [
+                    UpdateOne(
+                        {"category_name": name, "recipe_count": {"$exists": True}},
+                        {"$inc": {"recipe_count": count}},
+                    )
+                    for name, count in per_category.items()
+                ],
+                ordered=False,
+            )
+            bump_versions(db, "recipes", "categories")
+
+    for record in records:
+        recipe = to_recipe(record, valid_categories, created_by)
+        if recipe is None:
+            skipped += 1
+            continue
+        batch.append(recipe)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return inserted, skipped
+
+
+def _export_value(value):
+    """Convert BSON dates into ISO 8601 strings for export."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def export_recipes(db, stream, fmt, batch_size=1000):
+    """
+    Write every recipe to a JSON Lines or CSV stream.
+
+    Args:
+        db (Database): The PyMongo database
+        stream (file): Text stream to write
+        fmt (str): "jsonl" or "csv"
+        batch_size (int, optional): Documents fetched per round trip
+
+    Returns:
+        int: Number of recipes written
+    """
+    cursor = (
+        db.recipes.find({}, dict.fromkeys(EXPORT_FIELDS, 1) | {"_id": 0})
+        .sort("_id", 1)
+        .batch_size(batch_size)
+    )
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+
+    written = 0
+    for recipe in cursor:
+        row = {field: _export_value(recipe.get(field)) for field in EXPORT_FIELDS}
+        if writer:
+            if isinstance(row["ingredients"], list):
+                row["ingredients"] = "\n".join(row["ingredients"])
+            writer.writerow(row)
+        else:
+            stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+        written += 1
+    return written
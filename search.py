@@ -0,0 +1,113 @@
+"""
+Full-text recipe search for FlavorVault.
+
+Searches run against the ``recipe_text`` text index and are ranked by text
+score. Result pages are addressed by the (score, _id) of the last result
+shown, so later pages cost the same bounded query as the first.
+"""
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+
+from pagination import KeysetPage
+
+
+def score_cursor(document):
+    """
+    Build a search pagination cursor for a result document.
+
+    Args:
+        document (dict): A search result carrying its text ``score``
+
+    Returns:
+        str: The score and ``_id`` joined as ``"<score>:<id>"``
+    """
+    return f"{document['score']!r}:{document['_id']}"
+
+
+def parse_score_cursor(value):
+    """
+    Convert a search cursor from the query string into (score, ObjectId).
+
+    Args:
+        value (str): Raw ``after`` query string value
+
+    Returns:
+        tuple: The parsed (score, _id) pair, or None if missing or malformed
+    """
+    if not value:
+        return None
+    score, _, recipe_id = value.partition(":")
+    try:
+        return float(score), ObjectId(recipe_id)
+    except (InvalidId, TypeError, ValueError):
+        return None
+
+
+def search_recipes(
+    collection,
+    text,
+    category_name=None,
+    healthy=False,
+    projection=None,
+    page_size=20,
+    after=None,
+    session=None,
+):
+    """
+    Find recipes matching a text query, best matches first.
+
+    Args:
+        collection (Collection): The recipes collection
+        text (str): Words or phrases to search for
+        category_name (str, optional): Only return recipes in this category
+        healthy (bool, optional): Only return recipes marked healthy
+        projection (dict, optional): Fields to return besides the score
+        page_size (int, optional): Results per page. Defaults to 20.
+        after (tuple, optional): (score, _id) of the last result already shown
+        session (ClientSession, optional): Session to run the search in
+
+    Returns:
+        KeysetPage: One page of results, each carrying its text ``score``
+
+    Notes:
+        - Ties on score are broken by newest ``_id`` first so every result
+          has a stable position across pages
+    """
+    match = {"$text": {"$search": text}}
+    if category_name:
+        match["category_name"] = category_name
+    if healthy:
+        match["healthy"] = "on"
+
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if after is not None:
+        score, recipe_id = after
+        pipeline.append(
+            {
+                "$match": {
+                    "$or": [
+                        {"score": {"$lt": score}},
+                        {"score": score, "_id": {"$lt": recipe_id}},
+                    ]
+                }
+            }
+        )
+    pipeline.extend(
+        [
+            {"$sort": {"score": -1, "_id": -1}},
+            {"$limit": page_size + 1},
+        ]
+    )
+    if projection:
+        pipeline.append({"$project": {**projection, "score": 1}})
+
+    return KeysetPage(
+        collection.aggregate(pipeline, session=session),
+        page_size,
+        has_prev=after is not None,
+        cursor_for=score_cursor,
+    )
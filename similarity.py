@@ -0,0 +1,241 @@
+"""
+Similar recipe recommendations for FlavorVault.
+
+Each recipe stores its closest neighbours in ``similar``, computed offline
+by ``flask --app app recipes similar`` from TF-IDF vectors of its name,
+description and category. Neighbours are read together with the recipe
+itself, so no similarity is computed while serving a request.
+
+Recipes added or edited through the site are flagged ``similar_stale``.
+The job then scores only those recipes, plus any recipe listing one of
+them as a neighbour, against the whole collection, and merges the new
+scores into every other recipe's list. ``full=True`` rescores every
+recipe, which also refreshes the term weights as the vocabulary drifts.
+"""
+
+from collections import Counter
+import re
+
+import numpy as np
+from pymongo import UpdateOne
+from scipy import sparse
+
+TEXT_FIELDS = ("recipe_name", "recipe_description", "category_name")
+TOP_K = 5
+# Recipes scored per matrix product; bounds the size of each product
+BATCH_SIZE = 256
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the this to with".split()
+)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(recipe):
+    """
+    Split a recipe's text fields into the terms it is compared on.
+
+    Args:
+        recipe (dict): Recipe carrying the TEXT_FIELDS
+
+    Returns:
+        list: Lowercase words, without stop words and single letters
+    """
+    words = []
+    for field in TEXT_FIELDS:
+        words.extend(_WORD.findall(str(recipe.get(field) or "").lower()))
+    return [word for word in words if len(word) > 1 and word not in STOP_WORDS]
+
+
+def build_vectors(recipes):
+    """
+    Build the TF-IDF matrix of a list of recipes.
+
+    Args:
+        recipes (list): Recipes carrying the TEXT_FIELDS
+
+    Returns:
+        csr_matrix: One L2-normalised row per recipe, in the order given,
+                    so the product of two rows is their cosine similarity
+
+    Notes:
+        - Term frequencies are dampened to 1 + log(count) and weighted by
+          the smoothed inverse document frequency
+    """
+    vocabulary = {}
+    indptr, indices, counts = [0], [], []
+    for recipe in recipes:
+        terms = Counter(tokenize(recipe))
+        indices.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+        counts.extend(terms.values())
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), indices, indptr),
+        shape=(len(recipes), len(vocabulary)),
+    )
+    matrix.data = 1 + np.log(matrix.data)
+    document_frequency = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(recipes)) / (1 + document_frequency)) + 1
+    matrix = matrix @ sparse.diags(idf.astype(np.float32))
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (sparse.diags(1 / norms) @ matrix).tocsr()
+
+
+def _top(columns, scores, k):
+    """Return the k (score, column) pairs with the highest scores."""
+    if len(scores) > k:
+        best = np.argpartition(-scores, k)[:k]
+        columns, scores = columns[best], scores[best]
+    return sorted(zip(scores.tolist(), columns.tolist()), reverse=True)
+
+
+def score_batches(matrix, rows, batch_size=BATCH_SIZE):
+    """
+    Compute the similarity of some recipes to every recipe, in batches.
+
+    Args:
+        matrix (csr_matrix): Matrix from build_vectors
+        rows (list): Positions of the recipes to score
+        batch_size (int, optional): Recipes per matrix product
+
+    Yields:
+        tuple: The batch's row positions and a sparse matrix holding their
+               non-zero similarities, one row per position and one column
+               per recipe
+    """
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        yield batch, (matrix[batch] @ transposed).tocsr()
+
+
+def _neighbours(entries, recipes):
+    """Convert (score, position) pairs into stored neighbour entries."""
+    return [
+        {
+            "_id": recipes[position]["_id"],
+            "recipe_name": recipes[position].get("recipe_name"),
+            "score": round(score, 4),
+        }
+        for score, position in entries
+    ]
+
+
+def _stale(recipe, known_ids):
+    """Whether a recipe's neighbours must be recomputed from scratch."""
+    return (
+        recipe.get("similar_stale")
+        or "similar" not in recipe
+        or any(entry["_id"] not in known_ids for entry in recipe["similar"])
+    )
+
+
+def update_similar(db, full=False, k=TOP_K, batch_size=BATCH_SIZE):
+    """
+    Recompute the stored neighbours of changed recipes.
+
+    Args:
+        db (Database): The PyMongo database
+        full (bool, optional): Rescore every recipe. Defaults to False.
+        k (int, optional): Neighbours stored per recipe. Defaults to TOP_K.
+        batch_size (int, optional): Recipes per matrix product and per
+                                    bulk write. Defaults to BATCH_SIZE.
+
+    Returns:
+        int: Number of recipes whose neighbours were written
+
+    Notes:
+        - Recipes that are stale, have no neighbours yet or list a deleted
+          recipe are rescored, as are recipes listing a rescored recipe,
+          whose old score no longer holds
+        - Every other recipe only gains rescored recipes that now beat
+          its weakest neighbour, so it is not rescored itself; neighbours
+          are merged by ``_id``, so a rescored recipe it already lists is
+          replaced rather than listed twice
+        - A rescored recipe's flag is only cleared if its revision is
+          unchanged, so a recipe edited while the job runs stays stale
+    """
+    projection = dict.fromkeys(TEXT_FIELDS, 1) | {
+        "similar": 1,
+        "similar_stale": 1,
+        "revision": 1,
+    }
+    recipes = list(db.recipes.find({}, projection).sort("_id", 1))
+    if not recipes:
+        return 0
+    matrix = build_vectors(recipes)
+
+    if full:
+        targets = list(range(len(recipes)))
+    else:
+        known_ids = {recipe["_id"] for recipe in recipes}
+        stale_ids = {recipe["_id"] for recipe in recipes if _stale(recipe, known_ids)}
+        targets = [
+            position
+            for position, recipe in enumerate(recipes)
+            if recipe["_id"] in stale_ids
+            or any(entry["_id"] in stale_ids for entry in recipe.get("similar", ()))
+        ]
+    if not targets:
+        return 0
+
+    target_set = set(targets)
+    operations = []
+    # Scores of the rescored recipes, gathered per other recipe
+    gained = {}
+    for batch, scores in score_batches(matrix, targets, batch_size):
+        for offset, position in enumerate(batch):
+            row = slice(scores.indptr[offset], scores.indptr[offset + 1])
+            columns, values = scores.indices[row], scores.data[row]
+            keep = columns != position
+            recipe = recipes[position]
+            operations.append(
+                UpdateOne(
+                    {"_id": recipe["_id"], "revision": recipe.get("revision")},
+                    {
+                        "$set": {
+                            "similar": _neighbours(
+                                _top(columns[keep], values[keep], k), recipes
+                            )
+                        },
+                        "$unset": {"similar_stale": ""},
+                    },
+                )
+            )
+            if full:
+                continue
+            for column, value in zip(columns.tolist(), values.tolist()):
+                if column not in target_set:
+                    gained.setdefault(column, []).append((value, position))
+
+    if not full:
+        # A listed rescored recipe is replaced by its new score, or
+        # dropped if the two no longer share a term
+        rescored_ids = {recipes[position]["_id"] for position in targets}
+        for position, recipe in enumerate(recipes):
+            if position not in target_set and any(
+                entry["_id"] in rescored_ids for entry in recipe["similar"]
+            ):
+                gained.setdefault(position, [])
+
+    for position, entries in gained.items():
+        listed = recipes[position]["similar"]
+        current = [entry for entry in listed if entry["_id"] not in rescored_ids]
+        weakest = min((entry["score"] for entry in current), default=0)
+        entries = [entry for entry in entries if len(current) < k or entry[0] > weakest]
+        if not entries and len(current) == len(listed):
+            continue
+        merged = current + _neighbours(entries, recipes)
+        merged.sort(key=lambda entry: entry["score"], reverse=True)
+        operations.append(
+            UpdateOne(
+                {"_id": recipes[position]["_id"]}, {"$set": {"similar": merged[:k]}}
+            )
+        )
+
+    for start in range(0, len(operations), batch_size):
+        db.recipes.bulk_write(operations[start : start + batch_size], ordered=False)
+    return len(operations)
@@ -163,3 +163,18 @@ document.addEventListener("DOMContentLoaded", function () {
         });
     }
 });
+
+// Count a recipe view when its details are opened
+document.addEventListener("DOMContentLoaded", function () {
+    const headers = document.querySelectorAll("li[data-view-url] > .collapsible-header");
+
+    headers.forEach((header) => {
+        header.addEventListener("click", function () {
+            const item = this.parentElement;
+            // Materialize marks the item active after this handler runs
+            if (!item.classList.contains("active") && navigator.sendBeacon) {
+                navigator.sendBeacon(item.dataset.viewUrl);
+            }
+        });
+    });
+});
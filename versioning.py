@@ -0,0 +1,100 @@
+"""
+Collection version stamps for FlavorVault.
+
+Each mutable collection has a counter in the ``collection_versions``
+collection that is bumped on every write. Pages built from a collection
+can then be validated against the counter (a single ``_id`` lookup)
+instead of re-reading the collection itself.
+"""
+
+import hashlib
+import os
+
+from pymongo import UpdateOne
+
+VERSIONS_COLLECTION = "collection_versions"
+
+
+def bump_versions(db, *names):
+    """
+    Increment the version stamp of one or more collections.
+
+    Args:
+        db (Database): The PyMongo database
+        *names (str): Names of the collections that were written to
+
+    Notes:
+        - All stamps are bumped in a single round trip
+        - Missing stamps are created, starting at version 1
+    """
+    db[VERSIONS_COLLECTION].bulk_write(
+        [
+            UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+            for name in names
+        ],
+        ordered=False,
+    )
+
+
+def get_versions(db, *names, session=None):
+    """
+    Read the current version stamps of one or more collections.
+
+    Args:
+        db (Database): The PyMongo database
+        *names (str): Names of the collections to read stamps for
+        session (ClientSession, optional): Session to read the stamps in
+
+    Returns:
+        dict: Version number per collection name, 0 if never written
+    """
+    versions = dict.fromkeys(names, 0)
+    for stamp in db[VERSIONS_COLLECTION].find(
+        {"_id": {"$in": list(names)}}, session=session
+    ):
+        versions[stamp["_id"]] = stamp["version"]
+    return versions
+
+
+def make_etag(versions, *parts):
+    """
+    Derive a strong ETag from version stamps and any other page inputs.
+
+    Args:
+        versions (dict): Version number per collection name
+        *parts: Other values the rendered page depends on, such as the
+                logged-in user and the request path
+
+    Returns:
+        str: Hex digest suitable for use as an ETag
+    """
+    digest = hashlib.sha1()
+    for name in sorted(versions):
+        digest.update(f"{name}={versions[name]};".encode())
+    for part in parts:
+        digest.update(f"{part};".encode())
+    return digest.hexdigest()
+
+
+def template_fingerprint(folder):
+    """
+    Hash every template under a folder.
+
+    Used to salt page ETags so a deploy that changes the templates does not
+    leave browsers revalidating old HTML against unchanged data stamps.
+
+    Args:
+        folder (str): Path to the template folder
+
+    Returns:
+        str: Hex digest of the template paths and contents
+    """
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, folder).encode())
+            with open(path, "rb") as template:
+                digest.update(template.read())
+    return digest.hexdigest()
@@ -0,0 +1,192 @@
+"""
+Buffered view counters for FlavorVault.
+
+Recipe and category views are counted in memory and written in the
+background, so serving a page never waits on a write. Each worker adds up
+the views it sees per recipe and per category and flushes them as one
+unordered ``bulk_write`` of ``$inc`` updates: every ``VIEW_FLUSH_INTERVAL``
+seconds, as soon as ``VIEW_FLUSH_SIZE`` distinct items are waiting, and
+when the worker shuts down.
+
+Memory is bounded by ``VIEW_BUFFER_LIMIT`` distinct items. Views of items
+not already buffered are dropped while the buffer is full, and counted as
+dropped, rather than holding up the request that saw them.
+"""
+
+from collections import Counter
+import threading
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+
+class ViewCounter:
+    """
+    Flask extension buffering view counts and flushing them in bulk.
+
+    Attributes:
+        mongo (PyMongo): The shared Flask-PyMongo extension
+        flush_interval (float): Seconds between background flushes
+        flush_size (int): Buffered items that trigger an early flush
+        max_items (int): Buffered items beyond which new views are dropped
+        flushed (int): Views written to the database
+        dropped (int): Views lost to a full buffer
+        failures (int): Bulk writes that failed
+    """
+
+    def __init__(self, mongo):
+        self.mongo = mongo
+        self.flush_interval = 10.0
+        self.flush_size = 1000
+        self.max_items = 10000
+        self.flushed = 0
+        self.dropped = 0
+        self.failures = 0
+        # (collection, field, value) -> views not yet written
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        # Serialises flushes so a failed batch is merged back in order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._logger = None
+
+    def init_app(self, app):
+        """
+        Read the buffer config and start the background flush thread.
+
+        Args:
+            app (Flask): The application; reads VIEW_FLUSH_INTERVAL,
+                         VIEW_FLUSH_SIZE and VIEW_BUFFER_LIMIT
+
+        Notes:
+            - Call once per worker process, after any fork, as threads do
+              not survive a fork
+        """
+        self.flush_interval = app.config["VIEW_FLUSH_INTERVAL"]
+        self.flush_size = app.config["VIEW_FLUSH_SIZE"]
+        self.max_items = app.config["VIEW_BUFFER_LIMIT"]
+        self._logger = app.logger
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="view-counter", daemon=True
+            )
+            self._thread.start()
+
+    def record_recipe(self, recipe_id):
+        """
+        Count a view of a recipe.
+
+        Args:
+            recipe_id (ObjectId): The recipe viewed
+        """
+        self._record(("recipes", "_id", recipe_id))
+
+    def record_category(self, category_name):
+        """
+        Count a view of a category's recipe list.
+
+        Args:
+            category_name (str): The category viewed
+        """
+        self._record(("categories", "category_name", category_name))
+
+    def _record(self, key):
+        with self._lock:
+            if key not in self._counts and len(self._counts) >= self.max_items:
+                self.dropped += 1
+                full = True
+            else:
+                self._counts[key] += 1
+                full = len(self._counts) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Write every buffered view in one unordered bulk write per collection.
+
+        Returns:
+            int: Number of views written
+
+        Notes:
+            - Views of deleted recipes or categories match nothing and are
+              discarded; nothing is upserted
+            - If a write fails its views are merged back into the buffer,
+              as far as it has room, for the next flush
+        """
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return 0
+
+            operations = {}
+            for (collection, field, value), views in counts.items():
+                operations.setdefault(collection, []).append(
+                    UpdateOne({field: value}, {"$inc": {"views": views}})
+                )
+            written = 0
+            for collection, updates in operations.items():
+                try:
+                    self.mongo.db[collection].bulk_write(updates, ordered=False)
+                except PyMongoError as e:
+                    self.failures += 1
+                    self._logger.error(
+                        "Flushing %s views failed: %s", collection, str(e)
+                    )
+                    self._restore(
+                        {key: n for key, n in counts.items() if key[0] == collection}
+                    )
+                    continue
+                written += sum(
+                    views for key, views in counts.items() if key[0] == collection
+                )
+            with self._lock:
+                self.flushed += written
+            return written
+
+    def _restore(self, counts):
+        """Put the views of a failed write back into the buffer."""
+        with self._lock:
+            for key, views in counts.items():
+                if key in self._counts or len(self._counts) < self.max_items:
+                    self._counts[key] += views
+                else:
+                    self.dropped += views
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            failures = self.failures
+            self.flush()
+            if self.failures != failures:
+                # Back off while the database is unavailable
+                self._stopping.wait(self.flush_interval)
+
+    def shutdown(self):
+        """Stop the flush thread and write whatever is still buffered."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        """
+        Return the counter's statistics.
+
+        Returns:
+            dict: Views ``buffered``, ``flushed`` and ``dropped`` so far,
+                  and the number of write ``failures``
+        """
+        with self._lock:
+            return {
+                "buffered": sum(self._counts.values()),
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "failures": self.failures,
+            }
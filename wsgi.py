@@ -0,0 +1,11 @@
+"""
+WSGI entry point for FlavorVault.
+
+Production servers import this module in each worker process, for example
+``gunicorn wsgi:application``, so the app and its MongoClient are created
+after the server has forked.
+"""
+
+from app import create_app
+
+application = create_app()